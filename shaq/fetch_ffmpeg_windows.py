@@ -6,43 +6,64 @@ import shutil
 import tempfile
 import zipfile
 from pathlib import Path
+from typing import IO
 from urllib.request import Request, urlopen
 
 _DEFAULT_URL = "https://www.gyan.dev/ffmpeg/builds/ffmpeg-release-essentials.zip"
 
+# Large copy buffer: the default 16 KiB means thousands of tiny reads/writes per archive.
+_COPY_BUFSIZE = 1024 * 1024
+# Archives up to this size are spooled in memory instead of being round-tripped through disk.
+_IN_MEMORY_MAX_BYTES = 128 * 1024 * 1024
 
-def _download(url: str, dest: Path) -> None:
-    req = Request(url, headers={"User-Agent": "shaqfilegui-build"})
-    with urlopen(req) as resp, dest.open("wb") as out:
-        shutil.copyfileobj(resp, out)
+_WANTED_TOOLS = frozenset({"ffmpeg.exe", "ffprobe.exe"})
 
 
-def _extract_tools(zip_path: Path, out_dir: Path) -> list[Path]:
+def _download_into(url: str, spool: tempfile.SpooledTemporaryFile[bytes]) -> None:
+    req = Request(
+        url,
+        headers={"User-Agent": "shaqfilegui-build", "Accept-Encoding": "identity"},
+    )
+    with urlopen(req) as resp:
+        try:
+            length: int | None = int(resp.headers["Content-Length"])
+        except (KeyError, TypeError, ValueError):
+            length = None
+
+        if length is not None and length > _IN_MEMORY_MAX_BYTES:
+            # Too big to keep in memory: go to disk right away, and reserve the
+            # full size up front so the file isn't grown chunk by chunk.
+            spool.rollover()
+            os.ftruncate(spool.fileno(), length)
+
+        written = 0
+        while chunk := resp.read(_COPY_BUFSIZE):
+            spool.write(chunk)
+            written += len(chunk)
+        if length is not None and written != length:
+            raise RuntimeError(f"Download truncated: got {written} of {length} bytes")
+
+
+def _extract_tools(archive: IO[bytes], out_dir: Path) -> list[Path]:
     out_dir.mkdir(parents=True, exist_ok=True)
     extracted: list[Path] = []
 
-    with zipfile.ZipFile(zip_path) as zf:
-        name_map = {name.lower(): name for name in zf.namelist()}
-        want_suffixes = (
-            "\\bin\\ffmpeg.exe",
-            "\\bin\\ffprobe.exe",
-            "/bin/ffmpeg.exe",
-            "/bin/ffprobe.exe",
-        )
-
-        members: list[str] = []
-        for lower, original in name_map.items():
-            if lower.endswith(want_suffixes):
-                members.append(original)
+    with zipfile.ZipFile(archive) as zf:
+        members: list[zipfile.ZipInfo] = []
+        for info in zf.infolist():
+            directory, _sep, base = info.filename.lower().replace("\\", "/").rpartition("/")
+            if base in _WANTED_TOOLS and directory.rpartition("/")[2] == "bin":
+                members.append(info)
 
         if not members:
             raise RuntimeError("Zip does not contain ffmpeg.exe/ffprobe.exe in a /bin directory")
 
         for member in members:
-            target_name = Path(member).name
+            target_name = Path(member.filename).name
             target_path = out_dir / target_name
-            with zf.open(member) as src, target_path.open("wb") as dst:
-                shutil.copyfileobj(src, dst)
+            bufsize = max(1, min(member.file_size, _COPY_BUFSIZE))
+            with zf.open(member) as src, target_path.open("wb", buffering=0) as dst:
+                shutil.copyfileobj(src, dst, bufsize)
             extracted.append(target_path)
 
     return extracted
@@ -58,17 +79,21 @@ def main() -> None:
     parser.add_argument("--url", default=_DEFAULT_URL, help="ffmpeg zip URL (Windows build)")
     parser.add_argument(
         "--out-dir",
-        default=str(Path(__file__).resolve().parent / "vendor" / "ffmpeg"),
-        help="destination directory for ffmpeg.exe/ffprobe.exe",
+        default=None,
+        help="destination directory for ffmpeg.exe/ffprobe.exe (default: vendor/ffmpeg)",
     )
     args = parser.parse_args()
 
-    out_dir = Path(args.out_dir).resolve()
-    with tempfile.TemporaryDirectory() as tmp:
-        zip_path = Path(tmp) / "ffmpeg.zip"
+    if args.out_dir:
+        out_dir = Path(args.out_dir).resolve()
+    else:
+        out_dir = Path(__file__).parent / "vendor" / "ffmpeg"
+    # Typical builds stay in memory; only unusually large archives spill to disk.
+    with tempfile.SpooledTemporaryFile(max_size=_IN_MEMORY_MAX_BYTES) as spool:
         print(f"Downloading: {args.url}")
-        _download(args.url, zip_path)
-        extracted = _extract_tools(zip_path, out_dir)
+        _download_into(args.url, spool)
+        spool.seek(0)
+        extracted = _extract_tools(spool, out_dir)
 
     print("OK. Extracted:")
     for path in extracted:
@@ -1,24 +1,27 @@
+from __future__ import annotations
+
 import argparse
 import asyncio
 import json
 import logging
 import os
 import shutil
+import subprocess
 import sys
-import wave
-from collections.abc import Iterator
+import threading
+from collections.abc import Callable, Coroutine, Iterable, Iterator
 from contextlib import contextmanager
-from io import BytesIO
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, cast
 
-import pyaudio
-from pydub import AudioSegment
-from rich import progress
-from rich.console import Console
-from rich.logging import RichHandler
-from rich.status import Status
-from shazamio import Serialize, Shazam
+from shaq._file_scan import WAV_HEADER_SIZE, pack_wav_header_into
+
+if TYPE_CHECKING:
+    # pyaudio, rich and shazamio are all slow to import, so they're only
+    # imported where they're used: `--help` and argument errors need none of them.
+    import pyaudio
+    from rich.console import Console
+    from shazamio import Shazam
 
 logging.basicConfig(
     level=os.environ.get("SHAQ_LOGLEVEL", "INFO").upper(),
@@ -27,10 +30,12 @@ logging.basicConfig(
 )
 
 _DEFAULT_CHUNK_SIZE = 1024
-_FORMAT = pyaudio.paInt16
+_SAMPLE_WIDTH = 2  # bytes per sample for pyaudio.paInt16
 _DEFAULT_CHANNELS = 1
 _DEFAULT_SAMPLE_RATE = 16000
 _DEFAULT_DURATION = 10
+# Seconds into a --listen/--loopback capture at which we try recognizing early.
+_EARLY_MATCH_SECONDS = (3, 5, 7)
 
 logger = logging.getLogger(__name__)
 
@@ -52,11 +57,21 @@ def _default_history_file() -> Path:
     return Path.home() / ".shaq_history.txt"
 
 
+_history_dir_ready: set[Path] = set()
+
+
 def _append_history(history_file: Path, line: str) -> None:
     history_file = history_file.expanduser()
-    history_file.parent.mkdir(parents=True, exist_ok=True)
-    with history_file.open("a", encoding="utf-8") as io:
-        io.write(f"{line}\n")
+    if history_file.parent not in _history_dir_ready:
+        history_file.parent.mkdir(parents=True, exist_ok=True)
+        _history_dir_ready.add(history_file.parent)
+
+    # A single O_APPEND write keeps each line atomic and skips the buffered file machinery.
+    fd = os.open(history_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, f"{line}\n".encode())
+    finally:
+        os.close(fd)
 
 
 def _beep() -> None:
@@ -81,12 +96,14 @@ def _console() -> Iterator[Console]:
     This is done because of PyAudio's misbehaving internals.
     See: https://stackoverflow.com/questions/67765911
     """
+    from rich.console import Console
+
     try:
         # Save stdout and stderr, then clobber them.
         dup_fds = (os.dup(sys.stdout.fileno()), os.dup(sys.stderr.fileno()))
-        null_fds = tuple(os.open(os.devnull, os.O_WRONLY) for _ in range(2))
-        os.dup2(null_fds[0], sys.stdout.fileno())
-        os.dup2(null_fds[1], sys.stderr.fileno())
+        null_fd = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(null_fd, sys.stdout.fileno())
+        os.dup2(null_fd, sys.stderr.fileno())
 
         dup_stderr = os.fdopen(dup_fds[1], mode="w")
         yield Console(file=dup_stderr)
@@ -96,12 +113,14 @@ def _console() -> Iterator[Console]:
         os.dup2(dup_fds[0], sys.stdout.fileno())
         os.dup2(dup_fds[1], sys.stderr.fileno())
 
-        for fd in [*null_fds, *dup_fds]:
+        for fd in [null_fd, *dup_fds]:
             os.close(fd)
 
 
 @contextmanager
 def _pyaudio() -> Iterator[pyaudio.PyAudio]:
+    import pyaudio
+
     try:
         p = pyaudio.PyAudio()
         yield p
@@ -109,42 +128,125 @@ def _pyaudio() -> Iterator[pyaudio.PyAudio]:
         p.terminate()
 
 
-def _listen(console: Console, args: argparse.Namespace) -> bytearray:
-    with _pyaudio() as p, BytesIO() as io, wave.open(io, "wb") as wav:
+def _track(console: Console, chunks: range, description: str) -> Iterable[int]:
+    """
+    Wraps `chunks` in a Rich progress bar, but only on an interactive
+    terminal: otherwise the bar's refresh thread just competes with capture.
+    """
+    if not console.is_terminal:
+        return chunks
+
+    from rich import progress
+
+    tracked: Iterable[int] = progress.track(chunks, description=description, console=console)
+    return tracked
+
+
+def _snapshot_marks(args: argparse.Namespace) -> list[int]:
+    """
+    Returns the frame counts at which a capture should emit a snapshot,
+    last one first so callers can `pop()` them in order.
+    """
+    marks = [s * args.sample_rate for s in _EARLY_MATCH_SECONDS if s < args.duration]
+    return marks[::-1]
+
+
+def _wav_snapshot(buf: bytearray, data_size: int, args: argparse.Namespace) -> bytearray:
+    snapshot = bytearray(buf[: WAV_HEADER_SIZE + data_size])
+    pack_wav_header_into(
+        snapshot, data_size=data_size, sample_rate=args.sample_rate, channels=args.channels
+    )
+    return snapshot
+
+
+def _listen(
+    console: Console,
+    args: argparse.Namespace,
+    *,
+    on_snapshot: Callable[[bytearray], None] | None = None,
+    stop: threading.Event | None = None,
+) -> bytearray:
+    import pyaudio
+
+    with _pyaudio() as p:
+        total_frames = args.sample_rate * args.duration
+        frame_size = _SAMPLE_WIDTH * args.channels
+
+        # PortAudio delivers audio to `on_audio` on its own thread, which copies
+        # it straight into a preallocated WAV buffer; we stamp the header once
+        # at the end. This thread only waits, so a busy interpreter can't make
+        # us miss reads and overflow the device buffer.
+        buf = bytearray(WAV_HEADER_SIZE + total_frames * frame_size)
+        end = len(buf)
+        offset = WAV_HEADER_SIZE
+        full = threading.Event()
+
+        def on_audio(in_data: bytes, frame_count: int, time_info: Any, status: int) -> tuple:
+            nonlocal offset
+            n = min(len(in_data), end - offset)
+            view[offset : offset + n] = in_data[:n]
+            offset += n
+            if offset >= end:
+                full.set()
+                return None, pyaudio.paComplete
+            return None, pyaudio.paContinue
+
+        def wait_for(target: int) -> bool:
+            while offset < target:
+                if (stop is not None and stop.is_set()) or not stream.is_active():
+                    return False
+                full.wait(args.chunk_size / args.sample_rate)
+            return True
+
         # Use the same parameters as shazamio uses internally for audio
         # normalization, to reduce unnecessary transcoding.
-        wav.setnchannels(args.channels)
-        wav.setsampwidth(p.get_sample_size(_FORMAT))
-        wav.setframerate(args.sample_rate)
-
-        total_frames = args.sample_rate * args.duration
-        frames_recorded = 0
-
         stream = p.open(
-            format=_FORMAT,
+            format=pyaudio.paInt16,
             channels=args.channels,
             rate=args.sample_rate,
             input=True,
             frames_per_buffer=args.chunk_size,
+            stream_callback=on_audio,
+            start=False,
         )
-        for _ in progress.track(
-            range(0, total_frames, args.chunk_size),
-            description="shaq is listening...",
-            console=console,
-        ):
-            frames = min(args.chunk_size, total_frames - frames_recorded)
-            if frames <= 0:
-                break
-            wav.writeframes(stream.read(frames))
-            frames_recorded += frames
-
-        stream.close()
 
-        # TODO: Optimize if necessary; this makes at least one pointless copy.
-        return bytearray(io.getvalue())
+        marks = _snapshot_marks(args) if on_snapshot is not None else []
+
+        with memoryview(buf) as view:
+            stream.start_stream()
+            try:
+                for chunk_start in _track(
+                    console, range(0, total_frames, args.chunk_size), "shaq is listening..."
+                ):
+                    chunk_end = min(chunk_start + args.chunk_size, total_frames)
+                    if not wait_for(WAV_HEADER_SIZE + chunk_end * frame_size):
+                        break
+
+                    if on_snapshot is not None and marks and chunk_end >= marks[-1]:
+                        marks.pop()
+                        on_snapshot(_wav_snapshot(buf, offset - WAV_HEADER_SIZE, args))
+            finally:
+                stream.stop_stream()
+                stream.close()
+
+        del buf[offset:]
+        pack_wav_header_into(
+            buf,
+            data_size=offset - WAV_HEADER_SIZE,
+            sample_rate=args.sample_rate,
+            channels=args.channels,
+            sampwidth=_SAMPLE_WIDTH,
+        )
+        return buf
 
 
-def _loopback(console: Console, args: argparse.Namespace) -> bytearray:
+def _loopback(
+    console: Console,
+    args: argparse.Namespace,
+    *,
+    on_snapshot: Callable[[bytearray], None] | None = None,
+    stop: threading.Event | None = None,
+) -> bytearray:
     if sys.platform != "win32":
         console.print("[red]Fatal: --loopback is currently supported on Windows only[/red]")
         sys.exit(1)
@@ -169,61 +271,174 @@ def _loopback(console: Console, args: argparse.Namespace) -> bytearray:
 
     total_frames = args.sample_rate * args.duration
     frames_recorded = 0
+    marks = _snapshot_marks(args) if on_snapshot is not None else []
+
+    buf = bytearray(WAV_HEADER_SIZE + total_frames * args.channels * _SAMPLE_WIDTH)
+
+    with microphone.recorder(samplerate=args.sample_rate, channels=args.channels) as recorder:
+        # Convert every chunk in place: scale/clip into one reusable float32
+        # scratch buffer, then store it directly into the WAV buffer's PCM area.
+        scratch = np.empty((args.chunk_size, args.channels), dtype=np.float32)
+        pcm16 = np.frombuffer(buf, dtype="<i2", offset=WAV_HEADER_SIZE).reshape(
+            total_frames, args.channels
+        )
 
-    with (
-        BytesIO() as io,
-        wave.open(io, "wb") as wav,
-        microphone.recorder(samplerate=args.sample_rate, channels=args.channels) as recorder,
-    ):
-        wav.setnchannels(args.channels)
-        wav.setsampwidth(2)  # PCM16
-        wav.setframerate(args.sample_rate)
-
-        for _ in progress.track(
-            range(0, total_frames, args.chunk_size),
-            description="shaq is listening (loopback)...",
-            console=console,
+        for _ in _track(
+            console, range(0, total_frames, args.chunk_size), "shaq is listening (loopback)..."
         ):
             frames = min(args.chunk_size, total_frames - frames_recorded)
-            if frames <= 0:
+            if frames <= 0 or (stop is not None and stop.is_set()):
                 break
 
             chunk = recorder.record(numframes=frames)
-            pcm16 = (np.clip(chunk, -1.0, 1.0) * 32767).astype(np.int16)
-            wav.writeframes(pcm16.tobytes())
-            frames_recorded += frames
-
-        # TODO: Optimize if necessary; this makes at least one pointless copy.
-        return bytearray(io.getvalue())
+            n = min(frames, chunk.shape[0])
+            out = scratch[:n]
+            np.multiply(chunk[:n].reshape(n, args.channels), 32767.0, out=out)
+            np.clip(out, -32767.0, 32767.0, out=out)
+            pcm16[frames_recorded : frames_recorded + n] = out
+            frames_recorded += n
+
+            if on_snapshot is not None and marks and frames_recorded >= marks[-1]:
+                marks.pop()
+                data_size = frames_recorded * args.channels * _SAMPLE_WIDTH
+                on_snapshot(_wav_snapshot(buf, data_size, args))
+
+        del pcm16
+
+    data_size = frames_recorded * args.channels * _SAMPLE_WIDTH
+    del buf[WAV_HEADER_SIZE + data_size :]
+    pack_wav_header_into(
+        buf,
+        data_size=data_size,
+        sample_rate=args.sample_rate,
+        channels=args.channels,
+    )
+    return buf
 
 
 def _from_file(console: Console, args: argparse.Namespace) -> bytearray:
-    with Status(f"Extracting from {args.input}", console=console):
-        input = AudioSegment.from_file(args.input)
-
-        # pydub measures things in milliseconds
-        duration = args.duration * 1000
-        input = input[:duration]
+    from rich.status import Status
 
+    with Status(f"Extracting from {args.input}", console=console):
+        # Let ffmpeg stop decoding after the first `--duration` seconds, rather
+        # than decoding the whole file and throwing most of it away.
         # Keep output similar to our microphone/loopback recording format.
-        input = input.set_frame_rate(args.sample_rate).set_channels(args.channels).set_sample_width(2)
+        cmd = [
+            args.ffmpeg,
+            "-nostdin",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-i",
+            str(args.input),
+            "-t",
+            str(args.duration),
+            "-vn",
+            "-ac",
+            str(args.channels),
+            "-ar",
+            str(args.sample_rate),
+            "-f",
+            "s16le",
+            "pipe:1",
+        ]
+        try:
+            proc = subprocess.run(cmd, check=True, capture_output=True)
+        except subprocess.CalledProcessError as exc:
+            stderr = exc.stderr.decode("utf-8", errors="replace").strip()
+            detail = stderr or "ffmpeg failed"
+            console.print(f"[red]Fatal: couldn't decode {args.input}: {detail}[/red]")
+            sys.exit(1)
+
+        # ffmpeg can't seek back to fix up a WAV header on a pipe, so take raw
+        # PCM and add the (exact) header ourselves.
+        pcm = proc.stdout
+        buf = bytearray(WAV_HEADER_SIZE + len(pcm))
+        buf[WAV_HEADER_SIZE:] = pcm
+        pack_wav_header_into(
+            buf, data_size=len(pcm), sample_rate=args.sample_rate, channels=args.channels
+        )
+        return buf
+
+
+async def _recognize_while_capturing(
+    shazam: Shazam,
+    capture: Callable[..., bytearray],
+    console: Console,
+    args: argparse.Namespace,
+) -> dict[str, Any]:
+    """
+    Runs `capture` in a worker thread and tries to recognize each partial
+    snapshot it emits while the capture keeps going. The first snapshot
+    that matches stops the capture early; otherwise we fall back to
+    recognizing the full recording.
+    """
+    loop = asyncio.get_running_loop()
+    snapshots: asyncio.Queue[bytearray] = asyncio.Queue()
+    stop = threading.Event()
+
+    def on_snapshot(snapshot: bytearray) -> None:
+        loop.call_soon_threadsafe(snapshots.put_nowait, snapshot)
+
+    recording = asyncio.ensure_future(
+        asyncio.to_thread(capture, console, args, on_snapshot=on_snapshot, stop=stop)
+    )
+    try:
+        while not recording.done():
+            next_snapshot = asyncio.ensure_future(snapshots.get())
+            await asyncio.wait({next_snapshot, recording}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_snapshot.done():
+                next_snapshot.cancel()
+                break
 
-        with BytesIO() as io:
-            input.export(io, format="wav")
-            return bytearray(io.getvalue())
+            # If recognition fell behind the capture, only the newest snapshot matters.
+            snapshot = next_snapshot.result()
+            while not snapshots.empty():
+                snapshot = snapshots.get_nowait()
+
+            raw = await shazam.recognize(snapshot, proxy=args.proxy)
+            if raw.get("matches"):
+                return cast(dict[str, Any], raw)
+
+        return await shazam.recognize(await recording, proxy=args.proxy)  # type: ignore
+    finally:
+        # Always let the capture thread wind down (and release the audio device)
+        # before returning, even when we stopped it early.
+        stop.set()
+        await asyncio.wait({recording})
 
 
 async def _shaq(console: Console, args: argparse.Namespace) -> dict[str, Any]:
-    if args.listen:
-        input = _listen(console, args)
-    elif args.loopback:
-        input = _loopback(console, args)
-    else:
-        input = _from_file(console, args)
+    from shazamio import Shazam
 
     shazam = Shazam(language="en-US", endpoint_country="US")
 
+    if args.input:
+        input = _from_file(console, args)
+    else:
+        capture = _listen if args.listen else _loopback
+        if args.early_match:
+            return await _recognize_while_capturing(shazam, capture, console, args)
+        input = capture(console, args)
+
     return await shazam.recognize(input, proxy=args.proxy)  # type: ignore
+
+
+def _run(coro: Coroutine[Any, Any, dict[str, Any]]) -> dict[str, Any]:
+    """
+    Runs `coro` to completion, on uvloop when it's installed (it isn't
+    available on Windows) since its TLS client path is noticeably cheaper.
+    """
+    if sys.platform != "win32":
+        try:
+            import uvloop
+        except ImportError:
+            pass
+        else:
+            result: dict[str, Any] = uvloop.run(coro)
+            return result
+
+    return asyncio.run(coro)
 
 
 def _parser() -> argparse.ArgumentParser:
@@ -290,6 +505,13 @@ def _parser() -> argparse.ArgumentParser:
         default=_DEFAULT_SAMPLE_RATE,
         help="the sample rate to use; only affects --listen/--loopback",
     )
+    advanced_group.add_argument(
+        "--early-match",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="try recognizing partial recordings while still listening; "
+        "only affects --listen/--loopback",
+    )
     advanced_group.add_argument(
         "--proxy",
         type=str,
@@ -300,6 +522,9 @@ def _parser() -> argparse.ArgumentParser:
 
 def main() -> None:
     args = _parser().parse_args()
+    from rich.logging import RichHandler
+    from shazamio import Serialize
+
     with _console() as console:
         logger.addHandler(RichHandler(console=console))
         logger.debug(f"parsed {args=}")
@@ -310,12 +535,13 @@ def main() -> None:
             else:
                 args.listen = True
 
-        if args.input and not shutil.which("ffmpeg"):
+        args.ffmpeg = shutil.which("ffmpeg") if args.input else None
+        if args.input and not args.ffmpeg:
             console.print("[red]Fatal: ffmpeg not found on $PATH[/red]")
             sys.exit(1)
 
         try:
-            raw = asyncio.run(_shaq(console, args))
+            raw = _run(_shaq(console, args))
             track = Serialize.full_track(raw)
         except KeyboardInterrupt:
             console.print("[red]Interrupted.[/red]")
@@ -333,7 +559,6 @@ def main() -> None:
     if args.json:
         json.dump(raw, sys.stdout, indent=2)
     else:
-        track = Serialize.full_track(raw)
         if not track.matches:
             print("No matches.")
         else:
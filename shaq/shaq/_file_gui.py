@@ -1,44 +1,55 @@
 from __future__ import annotations
 
 import asyncio
+import datetime
+import email.utils
+import functools
+import hashlib
 import math
 import os
 import json
+import random
+import sqlite3
+import stat
 import threading
 import time
 import traceback
-import uuid
-import warnings
-from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait as wait_futures
-from dataclasses import dataclass
-from io import BytesIO
+import zlib
+from collections.abc import Callable, Coroutine, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from queue import Empty, Queue
-from tempfile import NamedTemporaryFile
-from typing import Any
-import wave
-
-warnings.filterwarnings("ignore", category=DeprecationWarning, message=r".*audioop.*deprecated.*")
-import audioop
+from queue import Empty, SimpleQueue
+from typing import Any, NamedTuple, TypeVar
 
 from shaq._i18n import I18n, UI_LANGUAGE_CHOICES, ui_language_from_config
 from shaq._file_scan import (
     FfmpegNotFoundError,
+    WavLayout,
     extract_wav_segment,
     format_hms,
+    loudest_windows,
+    open_pcm_wav,
+    parse_wav_layout,
     probe_duration_seconds,
     slice_wav_bytes,
+    window_energies,
 )
 from shaq._shazam_regions import (
-    SUPPORTED_ENDPOINT_COUNTRIES,
-    SUPPORTED_LANGUAGES,
     country_choice_strings,
     country_codes,
-    find_index_by_code,
+    country_index,
     language_choice_strings,
     language_codes,
+    language_index,
 )
 
+try:
+    import orjson  # optional: much faster JSON encoding than the stdlib
+except ImportError:  # pragma: no cover - optional at runtime
+    orjson = None  # type: ignore[assignment]
+
 _SYGNALISTA_GUI_IMPORT_ERROR: str | None = None
 try:
     import shaq._sygnalista_gui as _sygnalista_gui
@@ -76,20 +87,60 @@ _SHAZAM_PLATFORM = os.environ.get("SHAQ_SHAZAM_PLATFORM", "IPHONE")
 _SHAZAM_APP_VERSION = os.environ.get("SHAQ_SHAZAM_APP_VERSION", "14.1.0")
 _SHAZAM_TIME_ZONE = os.environ.get("SHAQ_SHAZAM_TIME_ZONE", "Europe/Warsaw")
 
-_SUPPORTED_SUFFIXES = {
-    ".aac",
-    ".flac",
-    ".latm",
-    ".loas",
-    ".mp2",
-    ".mp3",
-    ".mp4",
-    ".m4a",
-    ".ogg",
-    ".opus",
-    ".ts",
-    ".wav",
-}
+# Bursts of settings changes are written to the config file once they settle.
+_CONFIG_SAVE_DELAY_MS = 500
+# Files found while adding a folder reach the list in batches of at most this many
+# files, or whatever was found within the interval.
+_FOLDER_ADD_BATCH = 200
+_FOLDER_ADD_INTERVAL_S = 0.1
+# Worker progress updates are coalesced to at most one UI refresh per interval.
+_PROGRESS_UI_INTERVAL_S = 0.1
+# How often waiting scan threads check whether Stop was pressed.
+_STOP_POLL_INTERVAL_S = 0.25
+# Matches are written to the output file buffered; it's flushed after this many
+# lines or this long since the last flush (and always when the file is done).
+_OUTPUT_FLUSH_EVERY_MATCHES = 32
+_OUTPUT_FLUSH_INTERVAL_S = 5.0
+# Pause after an HTTP 429 without Retry-After: drawn from [base, 3 * previous pause],
+# capped, and reset once requests succeed again.
+_RATE_LIMIT_BACKOFF_BASE_S = 5.0
+_RATE_LIMIT_BACKOFF_CAP_S = 300.0
+
+_SUPPORTED_SUFFIXES = frozenset(
+    {
+        ".aac",
+        ".flac",
+        ".latm",
+        ".loas",
+        ".mp2",
+        ".mp3",
+        ".mp4",
+        ".m4a",
+        ".ogg",
+        ".opus",
+        ".ts",
+        ".wav",
+    }
+)
+_SUPPORTED_EXTS = frozenset(suffix[1:] for suffix in _SUPPORTED_SUFFIXES)
+_AUDIO_EXTS_WILDCARD = ";".join(f"*.{ext}" for ext in sorted(_SUPPORTED_EXTS))
+# Followed by the translated "all files" entry, see MainFrame._files_wildcard.
+_AUDIO_FILES_WILDCARD = f"Audio/video ({_AUDIO_EXTS_WILDCARD})|{_AUDIO_EXTS_WILDCARD}|"
+
+
+def _is_supported(name: str) -> bool:
+    """`Path(name).suffix.lower() in _SUPPORTED_SUFFIXES`, without creating a Path."""
+    dot = name.rfind(".")
+    return dot > 0 and name[dot + 1 :].lower() in _SUPPORTED_EXTS
+
+
+def _is_regular_file(name: str) -> bool:
+    """`Path.is_file()` on a plain string: a single stat(), no Path object."""
+    try:
+        return stat.S_ISREG(os.stat(name).st_mode)
+    except (OSError, ValueError):
+        return False
+
 
 _STRINGS: dict[str, dict[str, str]] = {
     "crash.unable_start": {"pl": "Nie mogę uruchomić aplikacji.", "en": "Unable to start the app."},
@@ -251,6 +302,10 @@ _STRINGS: dict[str, dict[str, str]] = {
         "pl": "Dodać też pliki z podfolderów?",
         "en": "Also add files from subfolders?",
     },
+    "progress.folder_scan": {
+        "pl": "Wyszukiwanie plików… (znaleziono: {count})",
+        "en": "Looking for files... (found: {count})",
+    },
     "info.no_supported_files": {
         "pl": "Nie znaleziono żadnych wspieranych plików w tym folderze.",
         "en": "No supported files found in this folder.",
@@ -383,6 +438,7 @@ _STRINGS: dict[str, dict[str, str]] = {
 }
 
 
+@functools.cache
 def _config_path() -> Path:
     if os.name == "nt" and (appdata := os.environ.get("APPDATA")):
         return Path(appdata) / _APP_NAME / "config.json"
@@ -404,13 +460,85 @@ def _load_config() -> dict[str, Any]:
     return data if isinstance(data, dict) else {}
 
 
+def _json_dumps(data: Any, *, pretty: bool = False) -> str:
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS if pretty else 0
+        try:
+            return orjson.dumps(data, option=option).decode("utf-8")
+        except TypeError:
+            pass  # e.g. non-str keys, which the stdlib encoder tolerates
+    if pretty:
+        return json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
 def _save_config(data: dict[str, Any]) -> None:
-    path = _config_path()
+    _write_file_atomic(_config_path(), _json_dumps(data, pretty=True).encode("utf-8"))
+
+
+def _write_file_atomic(path: Path, payload: bytes) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with NamedTemporaryFile("w", delete=False, encoding="utf-8", dir=str(path.parent)) as tmp:
-        json.dump(data, tmp, ensure_ascii=False, indent=2, sort_keys=True)
-        tmp_path = Path(tmp.name)
-    tmp_path.replace(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(tmp_path, flags, 0o600)
+    try:
+        try:
+            with memoryview(payload) as view:
+                while view:
+                    view = view[os.write(fd, view) :]
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Don't leave a half-written snapshot behind in the config directory.
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class _ConfigWriter:
+    """
+    Writes config snapshots on a background thread. Only the newest pending
+    snapshot is kept: requests that pile up behind a slow write collapse into one.
+    """
+
+    def __init__(self, *, on_error: Callable[[Exception], None]) -> None:
+        self._on_error = on_error
+        self._cond = threading.Condition()
+        self._pending: dict[str, Any] | None = None
+        self._writing = False
+        self._thread: threading.Thread | None = None
+
+    def submit(self, data: dict[str, Any]) -> None:
+        with self._cond:
+            self._pending = data
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="config-save", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def wait_idle(self) -> None:
+        """Blocks until nothing is pending or being written."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending is None and not self._writing)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None)
+                data, self._pending = self._pending, None
+                assert data is not None
+                self._writing = True
+            try:
+                _save_config(data)
+            except Exception as exc:
+                self._on_error(exc)
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
 
 
 def _win32_force_redraw(hwnd: int) -> None:
@@ -455,19 +583,75 @@ def _win32_force_redraw(hwnd: int) -> None:
         pass
 
 
+class _FolderScan:
+    """
+    Iterates the supported media files under `folder` lazily, in the same order
+    as sorting their paths, and counts the other files it passes in `skipped`.
+    Works on `os.scandir` entries, so only matching files become `Path` objects.
+    """
+
+    def __init__(
+        self, folder: Path, *, recursive: bool, stop: threading.Event | None = None
+    ) -> None:
+        self.folder = folder
+        self.recursive = recursive
+        self.stop = stop
+        self.skipped = 0
+
+    @staticmethod
+    def _sorted_entries(directory: str) -> Iterator[os.DirEntry[str]]:
+        try:
+            with os.scandir(directory) as entries:
+                listing = list(entries)
+        except OSError:
+            listing = []
+        listing.sort(key=lambda entry: os.path.normcase(entry.name))
+        return iter(listing)
+
+    def __iter__(self) -> Iterator[Path]:
+        # Depth-first with each directory's entries sorted by name, which is the
+        # order of sorting all paths at once, without holding the whole tree.
+        stack = [self._sorted_entries(os.fspath(self.folder))]
+        while stack:
+            if self.stop is not None and self.stop.is_set():
+                return
+            entry = next(stack[-1], None)
+            if entry is None:
+                stack.pop()
+                continue
+            try:
+                if self.recursive and entry.is_dir(follow_symlinks=False):
+                    stack.append(self._sorted_entries(entry.path))
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            if _is_supported(entry.name):
+                yield Path(entry.path)
+            else:
+                self.skipped += 1
+
+
 def _clamp_int(value: Any, *, minimum: int, maximum: int) -> int:
-    try:
-        number = int(value)
-    except Exception:
-        return minimum
+    if type(value) is int:  # the usual case for values read back from JSON
+        number = value
+    else:
+        try:
+            number = int(value)
+        except Exception:
+            return minimum
     return max(minimum, min(maximum, number))
 
 
 def _clamp_float(value: Any, *, minimum: float, maximum: float) -> float:
-    try:
-        number = float(value)
-    except Exception:
-        return minimum
+    if type(value) is float:
+        number = value
+    else:
+        try:
+            number = float(value)
+        except Exception:
+            return minimum
     return max(minimum, min(maximum, number))
 
 
@@ -485,7 +669,19 @@ def _coerce_bool(value: Any, *, default: bool) -> bool:
     return default
 
 
-@dataclass
+# Accepted ranges of the integer advanced settings read from the config file.
+_ADVANCED_INT_LIMITS: dict[str, tuple[int, int]] = {
+    "sample_duration_s": (5, 60),
+    "sig_duration_s": (5, 60),
+    "workers": (1, 32),
+    "min_api_interval_s": (0, 60),
+    "recognize_timeout_s": (10, 600),
+    "max_windows_per_sample": (1, 6),
+    "window_step_s": (1, 60),
+}
+
+
+@dataclass(frozen=True, slots=True)
 class _AdvancedSettings:
     sample_duration_s: int = int(_SAMPLE_DURATION_S)
     sig_duration_s: int = int(_SHAZAM_SEGMENT_DURATION_S)
@@ -505,6 +701,474 @@ class _AdvancedSettings:
     shazam_time_zone: str = str(_SHAZAM_TIME_ZONE)
 
 
+def _parse_retry_after_seconds(value: str | None, *, now: float | None = None) -> int | None:
+    """
+    Seconds to wait from a `Retry-After` header: either delay-seconds or an
+    HTTP-date (RFC 9110). None when it's missing, malformed or already due.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = int(value)
+    except ValueError:
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:  # "-0000": UTC, per RFC 5322
+            retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+        delay_s = retry_at.timestamp() - (time.time() if now is None else now)
+        seconds = math.ceil(delay_s)
+    if seconds <= 0:
+        return None
+    return seconds
+
+
+@dataclass
+class _HttpTrace:
+    last_status: int | None = None
+    # Only the response headers the scan reports on are kept.
+    retry_after: str | None = None
+    content_type: str | None = None
+    attempts: list[tuple[int, int]] = field(default_factory=list)
+
+    def reset(self) -> None:
+        self.last_status = None
+        self.retry_after = None
+        self.content_type = None
+        self.attempts = []
+
+
+class _RecognizeResult(NamedTuple):
+    """Outcome of one recognize request, read off its `_HttpTrace` once."""
+
+    raw: Any
+    error: Exception | None
+    status: int | None
+    attempts: list[tuple[int, int]]
+    retry_after: str | None
+    content_type: str | None
+    chain: str  # " (429->200)" style summary of the attempts, or ""
+
+    @classmethod
+    def from_trace(cls, raw: Any, error: Exception | None, trace: _HttpTrace) -> _RecognizeResult:
+        attempts = trace.attempts
+        chain = f" ({'->'.join(str(code) for _attempt, code in attempts)})" if attempts else ""
+        return cls(
+            raw,
+            error,
+            trace.last_status,
+            attempts,
+            trace.retry_after,
+            trace.content_type,
+            chain,
+        )
+
+
+# The trace of the Shazam request running in the current asyncio task. Requests for
+# several samples share one HTTP client concurrently, so per-request state can't
+# live on the client itself.
+_current_http_trace: ContextVar[_HttpTrace | None] = ContextVar(
+    "shaq_http_trace", default=None
+)
+
+_T = TypeVar("_T")
+
+
+class _UuidPool:
+    """
+    Hands out uppercase random (version 4) UUID strings, drawing the entropy
+    from `os.urandom` in batches rather than once per UUID.
+    """
+
+    _BATCH = 256
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._buf = b""
+        self._pos = 0
+
+    def next(self) -> str:
+        with self._lock:
+            if self._pos >= len(self._buf):
+                self._buf = os.urandom(16 * self._BATCH)
+                self._pos = 0
+            raw = bytearray(self._buf[self._pos : self._pos + 16])
+            self._pos += 16
+
+        raw[6] = (raw[6] & 0x0F) | 0x40  # version 4
+        raw[8] = (raw[8] & 0x3F) | 0x80  # RFC 4122 variant
+        h = raw.hex().upper()
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+_uuid_pool = _UuidPool()
+
+
+class _DurationCache:
+    """
+    Remembers `probe_duration_seconds` results per (path, mtime, size), so
+    re-scanning an unchanged file doesn't spawn ffprobe again. The newest
+    entries are kept in their own file next to the config, not in config.json.
+    """
+
+    _MAX_ENTRIES = 512
+    # ffprobe processes that prefetching may run at once, however many files are added.
+    _MAX_PREFETCH_PROBES = max(1, min(4, os.cpu_count() or 1))
+
+    def __init__(self, path: Callable[[], Path]) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[str, int, int], float] = {}
+        self._probing: dict[tuple[str, int, int], Future[float | None]] = {}
+        self._queued: dict[tuple[str, int, int], Future[None]] = {}
+        self._pool: ThreadPoolExecutor | None = None
+
+    def load(self) -> None:
+        try:
+            raw = json.loads(self._path().read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(raw, list):
+            return
+        with self._lock:
+            for item in raw[-self._MAX_ENTRIES :]:
+                try:
+                    path, mtime_ns, size, duration_s = item
+                    key = (str(path), int(mtime_ns), int(size))
+                    self._entries[key] = float(duration_s)
+                except (TypeError, ValueError):
+                    continue
+
+    def dump(self) -> list[list[Any]]:
+        with self._lock:
+            items = list(self._entries.items())[-self._MAX_ENTRIES :]
+        return [[path, mtime_ns, size, duration_s] for (path, mtime_ns, size), duration_s in items]
+
+    def save(self) -> None:
+        try:
+            _write_file_atomic(self._path(), _json_dumps(self.dump()).encode("utf-8"))
+        except OSError:
+            pass  # only a cache: the durations are probed again next time
+
+    def cached(self, input_path: Path) -> float | None:
+        """The cached duration of `input_path`, or None; never runs ffprobe."""
+        try:
+            st = input_path.stat()
+        except OSError:
+            return None
+        with self._lock:
+            return self._entries.get((str(input_path), st.st_mtime_ns, st.st_size))
+
+    def probe(self, input_path: Path) -> float | None:
+        try:
+            st = input_path.stat()
+        except OSError:
+            return probe_duration_seconds(input_path)
+        key = (str(input_path), st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            duration_s = self._entries.pop(key, None)
+            if duration_s is not None:
+                self._entries[key] = duration_s  # keep recently used entries last
+                return duration_s
+            running = self._probing.get(key)
+            if running is None:
+                pending: Future[float | None] = Future()
+                self._probing[key] = pending
+        if running is not None:
+            return running.result()  # another thread is already running ffprobe on it
+
+        try:
+            duration_s = probe_duration_seconds(input_path)
+        except BaseException as exc:
+            with self._lock:
+                del self._probing[key]
+            pending.set_exception(exc)
+            raise
+        with self._lock:
+            del self._probing[key]
+            if duration_s is not None:
+                self._entries[key] = duration_s
+                while len(self._entries) > self._MAX_ENTRIES:
+                    del self._entries[next(iter(self._entries))]
+        pending.set_result(duration_s)
+        return duration_s
+
+    def prefetch(self, paths: list[Path]) -> None:
+        """
+        Queues `paths` for probing on the cache's own small thread pool, so the
+        scan later finds them in the cache. Files that are already cached,
+        queued or being probed are skipped.
+        """
+        keyed: list[tuple[tuple[str, int, int], Path]] = []
+        for path in paths:
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            keyed.append(((str(path), st.st_mtime_ns, st.st_size), path))
+
+        with self._lock:
+            for key, path in keyed:
+                if key in self._entries or key in self._probing or key in self._queued:
+                    continue
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self._MAX_PREFETCH_PROBES,
+                        thread_name_prefix="duration-prefetch",
+                    )
+                self._queued[key] = self._pool.submit(self._prefetch_one, key, path)
+
+    def cancel_pending(self) -> None:
+        """Drops queued prefetches; probes that already started run to completion."""
+        with self._lock:
+            queued = list(self._queued.values())
+            self._queued.clear()
+        for future in queued:
+            future.cancel()
+
+    def _prefetch_one(self, key: tuple[str, int, int], path: Path) -> None:
+        with self._lock:
+            self._queued.pop(key, None)
+        try:
+            self.probe(path)
+        except Exception:
+            pass  # surfaced again when the file is actually scanned
+
+
+_duration_cache = _DurationCache(lambda: _config_path().with_name("durations.json"))
+
+_PCM_DTYPES = {1: "i1", 2: "<i2", 4: "<i4"}
+# Squared full-scale amplitude per sample width, the 0 dBFS reference for mean squares.
+_PCM_FULL_SCALE_SQ = {width: float((1 << (8 * width - 1)) - 1) ** 2 for width in _PCM_DTYPES}
+
+
+def _mean_square_dbfs(mean_square: float, *, sampwidth: int) -> float:
+    if mean_square <= 0:
+        return float("-inf")
+    return 10.0 * math.log10(mean_square / _PCM_FULL_SCALE_SQ[sampwidth])
+
+
+class _FingerprintCache:
+    """
+    Shazam responses stored on disk by a SHA-256 over the request's signature
+    and client settings (plus language and endpoint country), so re-scanning the
+    same audio doesn't go back to the API. Only responses with matches are kept:
+    a miss or an error is worth asking again. Best effort: if the database can't
+    be used, every lookup is a miss and results aren't stored.
+    """
+
+    _MAX_AGE_S = 30 * 24 * 60 * 60
+
+    def __init__(self, path: Callable[[], Path]) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._broken = False
+
+    def _connect(self) -> sqlite3.Connection | None:
+        # Called with the lock held.
+        if self._conn is None and not self._broken:
+            try:
+                path = self._path()
+                path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+            except (OSError, sqlite3.Error):
+                self._broken = True
+                return None
+            try:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    " sig_sha256 BLOB NOT NULL, language TEXT NOT NULL, country TEXT NOT NULL,"
+                    " raw_json BLOB NOT NULL, ts INTEGER NOT NULL,"
+                    " PRIMARY KEY (sig_sha256, language, country))"
+                )
+                conn.execute("DELETE FROM cache WHERE ts < ?", (self._now() - self._MAX_AGE_S,))
+                conn.commit()
+            except sqlite3.Error:
+                conn.close()
+                self._broken = True
+            else:
+                self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _now() -> int:
+        return int(time.time())
+
+    def get(self, key: bytes, language: str, country: str) -> Any | None:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    "SELECT raw_json, ts FROM cache"
+                    " WHERE sig_sha256 = ? AND language = ? AND country = ?",
+                    (key, language, country),
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+        if row is None or row[1] < self._now() - self._MAX_AGE_S:
+            return None
+        try:
+            return json.loads(zlib.decompress(row[0]))
+        except (zlib.error, ValueError):
+            return None
+
+    def put(self, key: bytes, language: str, country: str, raw: Any) -> None:
+        if not isinstance(raw, dict) or not raw.get("matches"):
+            return
+        try:
+            blob = zlib.compress(_json_dumps(raw).encode("utf-8"))
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)",
+                    (key, language, country, blob, self._now()),
+                )
+                conn.commit()
+            except sqlite3.Error:
+                pass
+
+    def close(self) -> None:
+        with self._lock:
+            # A scan thread still finishing after the window closed mustn't reopen it.
+            self._broken = True
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_fingerprint_cache = _FingerprintCache(lambda: _config_path().with_name("fingerprints.sqlite3"))
+
+
+class _AdaptiveThrottle:
+    """
+    Spaces out a file's Shazam requests across its workers, backing off after
+    a rate limit (HTTP 429) and easing back as requests succeed again.
+    """
+
+    def __init__(self, base_interval_s: float) -> None:
+        # Waiters sleep for exactly their computed wait; anything that moves
+        # the schedule wakes them to recompute it.
+        self._cv = threading.Condition()
+        self._next_allowed = 0.0
+        self._freeze_until = 0.0
+        self._base_interval_s = base_interval_s
+        self._min_interval_s = base_interval_s
+        self._rate_limit_hits = 0
+        self._successes_since_limit = 0
+        # Last pause chosen without a Retry-After (decorrelated jitter).
+        self._backoff_s = _RATE_LIMIT_BACKOFF_BASE_S
+        self._rng = random.Random()
+
+    def _compute_wait(self) -> float:
+        now = time.monotonic()
+        return max(self._freeze_until - now, self._next_allowed - now, 0.0)
+
+    def peek_wait_seconds(self) -> int:
+        with self._cv:
+            wait = self._compute_wait()
+        return int(math.ceil(wait)) if wait > 0 else 0
+
+    def wait_for_slot(self, stop_event: threading.Event) -> bool:
+        """
+        False if `stop_event` is set before a slot comes up. Whoever sets it
+        should call `wake_all`, so a long 429 freeze isn't sat out after Stop.
+        """
+        with self._cv:
+            while (wait := self._compute_wait()) > 0:
+                if stop_event.is_set():
+                    return False
+                self._cv.wait(timeout=wait)
+            self._next_allowed = time.monotonic() + self._min_interval_s
+        return True
+
+    def wake_all(self) -> None:
+        """Wakes every waiter so it rechecks its stop event."""
+        with self._cv:
+            self._cv.notify_all()
+
+    def note_success(self) -> None:
+        with self._cv:
+            if self._rate_limit_hits == 0:
+                return
+            self._successes_since_limit += 1
+            if self._successes_since_limit >= 10:
+                self._successes_since_limit = 0
+                self._backoff_s = _RATE_LIMIT_BACKOFF_BASE_S
+                self._min_interval_s = max(self._base_interval_s, self._min_interval_s * 0.8)
+
+    def note_rate_limit(self, retry_after_s: int | None) -> int:
+        with self._cv:
+            now = time.monotonic()
+            self._rate_limit_hits += 1
+            self._successes_since_limit = 0
+
+            if retry_after_s is None:
+                # Randomized so that a scan (or several instances) hitting the
+                # limit together doesn't come back at the same instant.
+                self._backoff_s = min(
+                    _RATE_LIMIT_BACKOFF_CAP_S,
+                    self._rng.uniform(_RATE_LIMIT_BACKOFF_BASE_S, self._backoff_s * 3),
+                )
+                retry_after_s = int(math.ceil(self._backoff_s))
+            self._freeze_until = max(self._freeze_until, now + retry_after_s)
+            self._min_interval_s = min(max(self._min_interval_s * 2, self._base_interval_s), 60.0)
+            self._cv.notify_all()
+
+            wait = self._compute_wait()
+        return int(math.ceil(wait)) if wait > 0 else 0
+
+    def note_near_rate_limit(self) -> None:
+        with self._cv:
+            if self._rate_limit_hits == 0:
+                self._rate_limit_hits = 1
+            self._successes_since_limit = 0
+            self._min_interval_s = min(max(self._min_interval_s, self._base_interval_s), 60.0)
+            self._cv.notify_all()
+
+
+class _LoopThread:
+    """
+    An asyncio event loop running on its own daemon thread, so that blocking
+    worker threads can share one loop (and one HTTP client) for their requests.
+    """
+
+    def __init__(
+        self, *, on_close: Callable[[], Coroutine[Any, Any, None]] | None = None
+    ) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._on_close = on_close
+
+    def __enter__(self) -> _LoopThread:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        try:
+            if self._on_close is not None:
+                self.run(self._on_close())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+
+    def run(self, coro: Coroutine[Any, Any, _T]) -> _T:
+        """Runs `coro` on the loop and blocks the calling thread until it's done."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+
 def _win_error_dialog(message: str) -> None:
     if os.name != "nt":
         return
@@ -556,13 +1220,16 @@ def _main() -> None:
     except Exception as exc:
         raise RuntimeError(f"Nie mogę załadować shazamio: {exc}") from exc
 
-    from aiohttp_retry import ExponentialRetry
+    from aiohttp import TCPConnector
+    from aiohttp_retry import ExponentialRetry, RetryClient
     from shazamio.client import HTTPClient
     from shazamio.converter import Converter
+    from shazamio.exceptions import BadMethod
     from shazamio.misc import ShazamUrl
+    from shazamio.utils import validate_json
 
     class _InstrumentedHTTPClient(HTTPClient):
-        def __init__(self) -> None:
+        def __init__(self, *, max_connections: int) -> None:
             super().__init__(
                 retry_options=ExponentialRetry(
                     attempts=4,
@@ -571,25 +1238,55 @@ def _main() -> None:
                     statuses={500, 502, 503, 504},
                 )
             )
-            self.last_status: int | None = None
-            self.last_url: str | None = None
-            self.last_headers: dict[str, str] = {}
-            self.attempts: list[tuple[int, int]] = []
-
             self.trace_config.on_request_end.append(self.on_request_end)
             self.trace_config.on_request_exception.append(self.on_request_exception)
+            self._max_connections = max_connections
+            self._client: RetryClient | None = None
+
+        def _retry_client(self) -> RetryClient:
+            # Unlike the base class (a new session per request), keep one session with a
+            # pooled connector for the whole scan so DNS/TCP/TLS setup is paid once.
+            if self._client is None:
+                self._client = RetryClient(
+                    retry_options=self.retry_options,
+                    raise_for_status=False,
+                    trace_configs=[self.trace_config],
+                    json_serialize=_json_dumps,
+                    connector=TCPConnector(
+                        limit=self._max_connections, ttl_dns_cache=300, keepalive_timeout=75
+                    ),
+                )
+            return self._client
+
+        async def close(self) -> None:
+            if self._client is not None:
+                await self._client.close()
+                self._client = None
 
-        def reset(self) -> None:
-            self.last_status = None
-            self.last_url = None
-            self.last_headers = {}
-            self.attempts = []
+        def begin_trace(self) -> _HttpTrace:
+            """Starts recording the requests made by the current task."""
+            trace = _HttpTrace()
+            _current_http_trace.set(trace)
+            return trace
 
         async def request(self, method: str, url: str, *args: Any, **kwargs: Any) -> Any:
-            self.reset()
-            return await super().request(method, url, *args, **kwargs)
+            if (trace := _current_http_trace.get()) is not None:
+                trace.reset()
+
+            client = self._retry_client()
+            if method.upper() == "GET":
+                async with client.get(url, **kwargs) as resp:
+                    return await validate_json(resp, *args)
+            if method.upper() == "POST":
+                async with client.post(url, **kwargs) as resp:
+                    return await validate_json(resp, *args)
+            raise BadMethod("Accept only GET/POST")
 
         async def on_request_end(self, _session: Any, trace_config_ctx: Any, params: Any) -> None:
+            trace = _current_http_trace.get()
+            if trace is None:
+                return
+
             attempt = trace_config_ctx.trace_request_ctx.get("current_attempt", 0)
             status = params.response.status
 
@@ -598,10 +1295,11 @@ def _main() -> None:
             except Exception:
                 attempt_n = 0
 
-            self.attempts.append((attempt_n, int(status)))
-            self.last_status = int(status)
-            self.last_url = str(params.url)
-            self.last_headers = {k: v for k, v in params.response.headers.items()}
+            trace.attempts.append((attempt_n, int(status)))
+            trace.last_status = int(status)
+            headers = params.response.headers
+            trace.retry_after = headers.get("Retry-After")
+            trace.content_type = headers.get("Content-Type")
 
         async def on_request_exception(
             self, _session: Any, _trace_config_ctx: Any, _params: Any
@@ -621,6 +1319,7 @@ def _main() -> None:
             time_zone: str,
             accept_language: str,
             segment_duration_seconds: int,
+            max_connections: int,
         ) -> None:
             self._device = device
             self._platform = platform
@@ -631,9 +1330,21 @@ def _main() -> None:
             super().__init__(
                 language=language,
                 endpoint_country=endpoint_country,
-                http_client=_InstrumentedHTTPClient(),
+                http_client=_InstrumentedHTTPClient(max_connections=max_connections),
                 segment_duration_seconds=segment_duration_seconds,
             )
+            # Everything in the search URL but the two UUIDs is fixed for the whole scan,
+            # so format it once and just concatenate the fresh UUIDs in per request.
+            url = ShazamUrl.SEARCH_FROM_FILE.format(
+                language=self.language,
+                device=self._device,
+                endpoint_country=self.endpoint_country,
+                uuid_1="\0",
+                uuid_2="\0",
+            )
+            self._search_url_parts = url.split("\0")
+            if len(self._search_url_parts) != 3:
+                raise RuntimeError("Unexpected Shazam search URL template")
 
         def headers(self) -> dict[str, str]:
             return {
@@ -657,15 +1368,10 @@ def _main() -> None:
                 sig.signature.samples,
                 sig.timestamp,
             )
+            prefix, middle, suffix = self._search_url_parts
             return await self.http_client.request(
                 "POST",
-                ShazamUrl.SEARCH_FROM_FILE.format(
-                    language=self.language,
-                    device=self._device,
-                    endpoint_country=self.endpoint_country,
-                    uuid_1=str(uuid.uuid4()).upper(),
-                    uuid_2=str(uuid.uuid4()).upper(),
-                ),
+                prefix + _uuid_pool.next() + middle + _uuid_pool.next() + suffix,
                 headers=self.headers(),
                 proxy=proxy,
                 json=data,
@@ -673,10 +1379,219 @@ def _main() -> None:
 
     app = wx.App(False)
     config = _load_config()
+    _duration_cache.load()
     ui_language = ui_language_from_config(config.get("ui_language"))
     i18n = I18n(ui_language, _STRINGS)
     t = i18n.t
 
+    class _FilesList(wx.ListCtrl):
+        """
+        Virtual single-column list over a list of strings owned by the caller: only
+        the visible rows are ever materialized, however many files are added.
+        """
+
+        def __init__(self, parent: wx.Window, items: list[str]) -> None:
+            super().__init__(parent, style=wx.LC_REPORT | wx.LC_VIRTUAL | wx.LC_NO_HEADER)
+            self._items = items
+            self.InsertColumn(0, "")
+            self.Bind(wx.EVT_SIZE, self._on_size)
+
+        def OnGetItemText(self, item: int, column: int) -> str:
+            return self._items[item] if 0 <= item < len(self._items) else ""
+
+        def sync(self) -> None:
+            """Call after the backing list changed."""
+            self.SetItemCount(len(self._items))
+            self.Refresh()
+
+        def selected_indices(self) -> list[int]:
+            selected: list[int] = []
+            idx = self.GetFirstSelected()
+            while idx != -1:
+                selected.append(idx)
+                idx = self.GetNextSelected(idx)
+            return selected
+
+        def clear_selection(self) -> None:
+            idx = self.GetFirstSelected()
+            while idx != -1:
+                self.Select(idx, on=False)
+                idx = self.GetNextSelected(idx)
+
+        def _on_size(self, event: wx.SizeEvent) -> None:
+            self.SetColumnWidth(0, max(self.GetClientSize().width, 1))
+            event.Skip()
+
+    class _AdvancedDialog(wx.Dialog):
+        """
+        The advanced settings dialog. Built once on first use and reused: `load()`
+        fills the controls, and after OK `result` holds the edited settings.
+        """
+
+        # (setting, label key, accessible name key) for the integer spin controls.
+        _INT_FIELDS: tuple[tuple[str, str, str], ...] = (
+            ("sample_duration_s", "adv.sample_seconds", "name.sample_seconds"),
+            ("sig_duration_s", "adv.signature_seconds", "name.signature_seconds"),
+            ("workers", "adv.workers", "name.workers"),
+            ("min_api_interval_s", "adv.min_api_interval", "name.min_api_interval"),
+            ("recognize_timeout_s", "adv.recognize_timeout", "name.recognize_timeout"),
+            ("max_windows_per_sample", "adv.max_windows", "name.max_windows"),
+            ("window_step_s", "adv.window_step", "name.window_step"),
+        )
+
+        def __init__(self, parent: wx.Window) -> None:
+            super().__init__(
+                parent,
+                title=t("dialog.advanced.title"),
+                style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER,
+            )
+            self.SetMinClientSize((740, 600))
+            self.result: _AdvancedSettings | None = None
+            self._base = _AdvancedSettings()
+            panel = wx.Panel(self)
+
+            recog_box = wx.StaticBoxSizer(
+                wx.StaticBox(panel, label=t("dialog.advanced.group_recognition")),
+                wx.VERTICAL,
+            )
+            recog_grid = wx.FlexGridSizer(cols=2, vgap=8, hgap=8)
+            recog_grid.AddGrowableCol(1, 1)
+
+            self._int_ctrls: dict[str, wx.SpinCtrl] = {}
+            for setting, label_key, name_key in self._INT_FIELDS:
+                lowest, highest = _ADVANCED_INT_LIMITS[setting]
+                ctrl = wx.SpinCtrl(panel, min=lowest, max=highest, initial=lowest)
+                ctrl.SetName(t(name_key))
+                self._int_ctrls[setting] = ctrl
+                recog_grid.Add(
+                    wx.StaticText(panel, label=t(label_key)), 0, wx.ALIGN_CENTER_VERTICAL
+                )
+                recog_grid.Add(ctrl, 0, wx.EXPAND)
+
+            self._silence = wx.TextCtrl(panel)
+            self._silence.SetName(t("name.silence_dbfs"))
+            recog_grid.Add(
+                wx.StaticText(panel, label=t("adv.silence_dbfs")), 0, wx.ALIGN_CENTER_VERTICAL
+            )
+            recog_grid.Add(self._silence, 0, wx.EXPAND)
+
+            self._debug = wx.CheckBox(panel, label=t("adv.debug_audio"))
+            self._debug.SetName(t("name.debug_audio"))
+
+            recog_box.Add(recog_grid, 0, wx.ALL | wx.EXPAND, 8)
+            recog_box.Add(self._debug, 0, wx.LEFT | wx.RIGHT | wx.BOTTOM, 8)
+
+            http_box = wx.StaticBoxSizer(
+                wx.StaticBox(panel, label=t("dialog.advanced.group_http")),
+                wx.VERTICAL,
+            )
+            http_grid = wx.FlexGridSizer(cols=2, vgap=8, hgap=8)
+            http_grid.AddGrowableCol(1, 1)
+
+            self._device = wx.TextCtrl(panel)
+            self._device.SetName("Device (URL)")
+            self._accept = wx.TextCtrl(panel)
+            self._accept.SetName("Accept-Language")
+            self._accept.SetToolTip(t("tooltip.accept_language"))
+            self._ua = wx.TextCtrl(panel)
+            self._ua.SetName("User-Agent")
+            self._platform = wx.TextCtrl(panel)
+            self._platform.SetName("X-Shazam-Platform")
+            self._appver = wx.TextCtrl(panel)
+            self._appver.SetName("X-Shazam-AppVersion")
+            self._tz = wx.TextCtrl(panel)
+            self._tz.SetName("Time zone")
+
+            for label, ctrl in [
+                ("Device (URL):", self._device),
+                (t("adv.accept_language"), self._accept),
+                ("User-Agent:", self._ua),
+                ("X-Shazam-Platform:", self._platform),
+                ("X-Shazam-AppVersion:", self._appver),
+                ("Time zone:", self._tz),
+            ]:
+                http_grid.Add(wx.StaticText(panel, label=label), 0, wx.ALIGN_CENTER_VERTICAL)
+                http_grid.Add(ctrl, 0, wx.EXPAND)
+
+            http_box.Add(http_grid, 0, wx.ALL | wx.EXPAND, 8)
+
+            root = wx.BoxSizer(wx.VERTICAL)
+            root.Add(recog_box, 0, wx.ALL | wx.EXPAND, 12)
+            root.Add(http_box, 0, wx.LEFT | wx.RIGHT | wx.BOTTOM | wx.EXPAND, 12)
+
+            buttons = wx.StdDialogButtonSizer()
+            ok_btn = wx.Button(panel, wx.ID_OK)
+            cancel_btn = wx.Button(panel, wx.ID_CANCEL)
+            buttons.AddButton(ok_btn)
+            buttons.AddButton(cancel_btn)
+            buttons.Realize()
+            self.SetAffirmativeId(wx.ID_OK)
+            self.SetEscapeId(wx.ID_CANCEL)
+            ok_btn.SetDefault()
+
+            root.Add(buttons, 0, wx.ALL | wx.EXPAND, 12)
+            panel.SetSizer(root)
+
+            dialog_sizer = wx.BoxSizer(wx.VERTICAL)
+            dialog_sizer.Add(panel, 1, wx.EXPAND)
+            self.SetSizer(dialog_sizer)
+            self.Layout()
+
+            ok_btn.Bind(wx.EVT_BUTTON, self._on_ok)
+            cancel_btn.Bind(wx.EVT_BUTTON, lambda _e: self.EndModal(wx.ID_CANCEL))
+            self.Bind(wx.EVT_CLOSE, self._on_close)
+
+        def load(self, settings: _AdvancedSettings) -> None:
+            self._base = settings
+            self.result = None
+            for setting, ctrl in self._int_ctrls.items():
+                ctrl.SetValue(int(getattr(settings, setting)))
+            self._silence.SetValue(str(settings.silence_dbfs_threshold))
+            self._debug.SetValue(bool(settings.debug_audio))
+            self._device.SetValue(settings.shazam_device)
+            self._accept.SetValue(settings.shazam_accept_language)
+            self._ua.SetValue(settings.shazam_user_agent)
+            self._platform.SetValue(settings.shazam_platform)
+            self._appver.SetValue(settings.shazam_app_version)
+            self._tz.SetValue(settings.shazam_time_zone)
+
+        def _on_ok(self, _event: wx.CommandEvent) -> None:
+            int_values = {
+                setting: int(ctrl.GetValue()) for setting, ctrl in self._int_ctrls.items()
+            }
+            if int_values["sig_duration_s"] > int_values["sample_duration_s"]:
+                wx.MessageBox(t("adv.error.sig_gt_sample"), _APP_NAME, wx.OK | wx.ICON_ERROR, self)
+                return
+
+            try:
+                silence_dbfs = float(self._silence.GetValue().strip().replace(",", "."))
+            except ValueError:
+                wx.MessageBox(
+                    t("adv.error.invalid_silence"), _APP_NAME, wx.OK | wx.ICON_ERROR, self
+                )
+                return
+
+            self.result = replace(
+                self._base,
+                **int_values,
+                silence_dbfs_threshold=silence_dbfs,
+                debug_audio=bool(self._debug.GetValue()),
+                shazam_device=self._device.GetValue().strip() or _SHAZAM_DEVICE,
+                shazam_accept_language=self._accept.GetValue().strip(),
+                shazam_user_agent=self._ua.GetValue().strip() or _SHAZAM_USER_AGENT,
+                shazam_platform=self._platform.GetValue().strip() or _SHAZAM_PLATFORM,
+                shazam_app_version=self._appver.GetValue().strip() or _SHAZAM_APP_VERSION,
+                shazam_time_zone=self._tz.GetValue().strip() or _SHAZAM_TIME_ZONE,
+            )
+            self.EndModal(wx.ID_OK)
+
+        def _on_close(self, event: wx.CloseEvent) -> None:
+            # Hidden, not destroyed: the main window owns the dialog and reuses it.
+            if self.IsModal():
+                self.EndModal(wx.ID_CANCEL)
+            else:
+                event.Skip()
+
     class MainFrame(wx.Frame):
         def __init__(self) -> None:
             super().__init__(None, title=_APP_NAME)
@@ -686,9 +1601,22 @@ def _main() -> None:
             self.CreateStatusBar()
             self.SetStatusText(t("status.ready"))
 
-            self._events: Queue[tuple[str, Any]] = Queue()
+            self._progress_lock = threading.Lock()
+            self._pending_progress: dict[str, Any] | None = None
+            self._last_progress_at = 0.0
+            self._log_lock = threading.Lock()
+            self._pending_log: list[str] = []
+            self._closing = False
+            self._advanced_dialog: _AdvancedDialog | None = None
+            # `t` is fixed for the session (a UI language change needs a restart), so
+            # constant strings that are reused after startup are resolved once here.
+            self._files_wildcard = _AUDIO_FILES_WILDCARD + t("file_dialog.all_files")
+            self._config_save_timer: wx.CallLater | None = None
+            self._config_writer = _ConfigWriter(on_error=self._on_config_save_failed)
+            self._last_saved_config: dict[str, Any] | None = None
             self._stop_event = threading.Event()
             self._worker: threading.Thread | None = None
+            self._throttle: _AdaptiveThrottle | None = None
             self._scan_duration_s: int | None = None
             self._scan_total_samples: int | None = None
             self._scan_elapsed_s: int = 0
@@ -701,44 +1629,32 @@ def _main() -> None:
             self._scan_file_name: str | None = None
 
             self._input_paths: list[Path] = []
+            self._input_path_strs: list[str] = []  # str() of each entry, parallel to the list
+            self._input_path_keys: set[str] = set()  # same strings, for O(1) dedupe
+            self._file_count_timer: wx.CallLater | None = None
+            self._file_count_shown_at = 0.0
             self._remember_file_list: bool = _coerce_bool(
                 config.get("remember_file_list"),
                 default=True,
             )
+            self._process_longest_first: bool = _coerce_bool(
+                config.get("process_longest_first"),
+                default=False,
+            )
 
             adv_cfg = config.get("advanced") if isinstance(config.get("advanced"), dict) else {}
             defaults = _AdvancedSettings()
-            sample_duration_s = _clamp_int(
-                adv_cfg.get("sample_duration_s", defaults.sample_duration_s),
-                minimum=5,
-                maximum=60,
-            )
-            sig_duration_s = _clamp_int(
-                adv_cfg.get("sig_duration_s", defaults.sig_duration_s), minimum=5, maximum=60
+            int_settings = {
+                name: _clamp_int(
+                    adv_cfg.get(name, getattr(defaults, name)), minimum=lowest, maximum=highest
+                )
+                for name, (lowest, highest) in _ADVANCED_INT_LIMITS.items()
+            }
+            int_settings["sample_duration_s"] = max(
+                int_settings["sample_duration_s"], int_settings["sig_duration_s"]
             )
-            sample_duration_s = max(sample_duration_s, sig_duration_s)
             self._advanced = _AdvancedSettings(
-                sample_duration_s=sample_duration_s,
-                sig_duration_s=min(sig_duration_s, sample_duration_s),
-                workers=_clamp_int(adv_cfg.get("workers", defaults.workers), minimum=1, maximum=32),
-                min_api_interval_s=_clamp_int(
-                    adv_cfg.get("min_api_interval_s", defaults.min_api_interval_s),
-                    minimum=0,
-                    maximum=60,
-                ),
-                recognize_timeout_s=_clamp_int(
-                    adv_cfg.get("recognize_timeout_s", defaults.recognize_timeout_s),
-                    minimum=10,
-                    maximum=600,
-                ),
-                max_windows_per_sample=_clamp_int(
-                    adv_cfg.get("max_windows_per_sample", defaults.max_windows_per_sample),
-                    minimum=1,
-                    maximum=6,
-                ),
-                window_step_s=_clamp_int(
-                    adv_cfg.get("window_step_s", defaults.window_step_s), minimum=1, maximum=60
-                ),
+                **int_settings,
                 silence_dbfs_threshold=_clamp_float(
                     adv_cfg.get("silence_dbfs_threshold", defaults.silence_dbfs_threshold),
                     minimum=-100.0,
@@ -777,7 +1693,7 @@ def _main() -> None:
             self.ui_language_choice.Bind(wx.EVT_CHOICE, self._on_ui_language_changed)
 
             files_label = wx.StaticText(panel, label=t("label.files_to_scan"))
-            self.files_list = wx.ListBox(panel, style=wx.LB_EXTENDED)
+            self.files_list = _FilesList(panel, self._input_path_strs)
             self.files_list.SetName(t("name.files_to_scan"))
 
             self.add_files_btn = wx.Button(panel, label=t("button.add_files"))
@@ -824,7 +1740,7 @@ def _main() -> None:
             self.language_choice.SetName(t("name.shazam_language"))
             self.language_choice.SetToolTip(t("tooltip.shazam_language"))
             cfg_language = str(config.get("language") or "").strip() or _SHAZAM_URL_LANGUAGE
-            lang_idx = find_index_by_code(SUPPORTED_LANGUAGES, cfg_language)
+            lang_idx = language_index(cfg_language)
             self.language_choice.SetSelection(lang_idx if lang_idx is not None else 0)
 
             country_label = wx.StaticText(panel, label=t("label.shazam_country"))
@@ -833,7 +1749,7 @@ def _main() -> None:
             self.country_choice.SetName(t("name.shazam_country"))
             self.country_choice.SetToolTip(t("tooltip.shazam_country"))
             cfg_country = str(config.get("endpoint_country") or "").strip() or _SHAZAM_ENDPOINT_COUNTRY
-            country_idx = find_index_by_code(SUPPORTED_ENDPOINT_COUNTRIES, cfg_country)
+            country_idx = country_index(cfg_country)
             self.country_choice.SetSelection(country_idx if country_idx is not None else 0)
 
             self.progress = wx.Gauge(panel, range=100)
@@ -909,30 +1825,39 @@ def _main() -> None:
             root.Add(buttons, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 12)
             panel.SetSizer(root)
 
-            self._load_input_paths_from_config()
+            # Controls that are disabled while a scan runs (see _set_running).
+            self._idle_only_widgets: list[wx.Window] = [
+                self.scan_btn,
+                self.files_list,
+                self.add_files_btn,
+                self.add_folder_btn,
+                self.remove_files_btn,
+                self.clear_files_btn,
+                self.ui_language_choice,
+                self.out_dir,
+                self.out_dir_browse_btn,
+                self.interval,
+                self.language_choice,
+                self.country_choice,
+                self.advanced_btn,
+                self.remember_files_cb,
+            ]
 
-            self._timer = wx.Timer(self)
-            self.Bind(wx.EVT_TIMER, self._on_timer, self._timer)
-            self._timer.Start(150)
+            self._load_input_paths_from_config()
 
             self.Bind(wx.EVT_CLOSE, self._on_close)
 
         def _set_running(self, running: bool) -> None:
-            self.scan_btn.Enable(not running)
-            self.stop_btn.Enable(running)
-            self.files_list.Enable(not running)
-            self.add_files_btn.Enable(not running)
-            self.add_folder_btn.Enable(not running)
-            self.remove_files_btn.Enable(not running)
-            self.clear_files_btn.Enable(not running)
-            self.ui_language_choice.Enable(not running)
-            self.out_dir.Enable(not running)
-            self.out_dir_browse_btn.Enable(not running)
-            self.interval.Enable(not running)
-            self.language_choice.Enable(not running)
-            self.country_choice.Enable(not running)
-            self.advanced_btn.Enable(not running)
-            self.remember_files_cb.Enable(not running)
+            self.Freeze()
+            try:
+                if self.stop_btn.IsEnabled() != running:
+                    self.stop_btn.Enable(running)
+                for widget in self._idle_only_widgets:
+                    # Skip widgets already in the right state; each Enable() is a native call.
+                    if widget.IsEnabled() == running:
+                        widget.Enable(not running)
+            finally:
+                self.Thaw()
 
         def _collect_config(self) -> dict[str, Any]:
             ui_language_value = ui_language
@@ -953,8 +1878,9 @@ def _main() -> None:
             return {
                 "version": _CONFIG_VERSION,
                 "ui_language": ui_language_value,
-                "input_paths": [str(p) for p in self._input_paths[:200]] if self._remember_file_list else [],
+                "input_paths": self._input_path_strs[:200] if self._remember_file_list else [],
                 "remember_file_list": self._remember_file_list,
+                "process_longest_first": self._process_longest_first,
                 "output_dir": self.out_dir.GetValue(),
                 "interval_s": int(self.interval.GetValue()),
                 "language": language,
@@ -978,12 +1904,47 @@ def _main() -> None:
                 },
             }
 
-        def _persist_config(self) -> None:
+        def _persist_config(self, *, immediate: bool = False) -> None:
+            """
+            Schedules a config save; changes made in quick succession (e.g. adding
+            many files) end up in a single write once they stop for a moment.
+            """
+            if immediate:
+                if self._config_save_timer is not None:
+                    self._config_save_timer.Stop()
+                self._flush_config(wait=True)
+            elif self._config_save_timer is None:
+                self._config_save_timer = wx.CallLater(_CONFIG_SAVE_DELAY_MS, self._flush_config)
+            else:
+                self._config_save_timer.Start(_CONFIG_SAVE_DELAY_MS)
+
+        def _flush_config(self, *, wait: bool = False) -> None:
+            """
+            Collects the settings on the UI thread and hands the write to the config
+            writer thread. With `wait`, writes right away once any pending save is done.
+            """
+            data = self._collect_config()
+            if data == self._last_saved_config:
+                return  # e.g. a checkbox toggled back; nothing to write
+            self._last_saved_config = data
+            if not wait:
+                self._config_writer.submit(data)
+                return
+            self._config_writer.wait_idle()
             try:
-                _save_config(self._collect_config())
+                _save_config(data)
             except Exception as exc:
+                self._last_saved_config = None
                 self.SetStatusText(t("status.config_save_failed", error=str(exc)))
 
+        def _on_config_save_failed(self, exc: Exception) -> None:
+            # Runs on the writer thread.
+            self._last_saved_config = None  # retry on the next change
+            if not self._closing:
+                wx.CallAfter(
+                    self.SetStatusText, t("status.config_save_failed", error=str(exc))
+                )
+
         def _on_report_issue(self, _event: wx.CommandEvent) -> None:
             try:
                 from shaq import __version__ as app_version  # type: ignore
@@ -1034,21 +1995,58 @@ def _main() -> None:
             raw_list = config.get("input_paths")
             if not isinstance(raw_list, list):
                 return
+            paths: list[Path] = []
             for item in raw_list[:200]:
-                try:
-                    path = Path(str(item)).expanduser()
-                except Exception:
+                if not isinstance(item, str) or not item:
                     continue
-                if path.exists() and path.is_file():
-                    self._add_input_path(path)
-
-        def _add_input_path(self, path: Path) -> None:
-            path = path.expanduser()
-            key = str(path)
-            if any(str(existing) == key for existing in self._input_paths):
+                name = os.path.expanduser(item)
+                if _is_regular_file(name):
+                    paths.append(Path(name))
+            self._add_input_paths(paths)
+
+        def _add_input_paths(self, paths: Iterable[Path]) -> list[Path]:
+            """
+            Appends the paths that aren't listed yet, updating the list control in a
+            single batch, and returns them. Their durations are probed in the background.
+            Paths must already be expanded (`~` resolved).
+            """
+            new_paths: list[Path] = []
+            new_strs: list[str] = []
+            for path in paths:
+                key = str(path)
+                if key in self._input_path_keys:
+                    continue
+                self._input_path_keys.add(key)
+                new_paths.append(path)
+                new_strs.append(key)
+            if not new_paths:
+                return new_paths
+
+            self._input_paths.extend(new_paths)
+            self._input_path_strs.extend(new_strs)
+            self._show_file_count()
+            _duration_cache.prefetch(new_paths)
+            return new_paths
+
+        def _show_file_count(self, *, immediate: bool = False) -> None:
+            """
+            Syncs the files list and the "files selected" status. A folder scan adds a
+            batch every few milliseconds; those bursts update them at most every 100 ms.
+            """
+            if self._closing:
                 return
-            self._input_paths.append(path)
-            self.files_list.Append(str(path))
+            if not immediate:
+                wait_s = self._file_count_shown_at + _PROGRESS_UI_INTERVAL_S - time.monotonic()
+                if wait_s > 0:
+                    if self._file_count_timer is None or not self._file_count_timer.IsRunning():
+                        self._file_count_timer = wx.CallLater(
+                            max(1, int(wait_s * 1000)), self._show_file_count
+                        )
+                    return
+            if self._file_count_timer is not None:
+                self._file_count_timer.Stop()
+            self._file_count_shown_at = time.monotonic()
+            self.files_list.sync()
             self.SetStatusText(t("status.files_selected", count=len(self._input_paths)))
 
         def _on_ui_language_changed(self, _event: wx.CommandEvent) -> None:
@@ -1060,14 +2058,6 @@ def _main() -> None:
             self._persist_config()
 
         def _on_add_files(self, _event: wx.CommandEvent) -> None:
-            wildcard = (
-                "Audio/video (*.mp3;*.mp2;*.aac;*.flac;*.wav;*.ogg;*.opus;"
-                "*.mp4;*.m4a;*.ts;*.loas;*.latm)|"
-                "*.mp3;*.mp2;*.aac;*.flac;*.wav;*.ogg;*.opus;"
-                "*.mp4;*.m4a;*.ts;*.loas;*.latm|"
-                + t("file_dialog.all_files")
-            )
-
             start_dir = ""
             if self._input_paths:
                 start_dir = str(self._input_paths[-1].parent)
@@ -1076,19 +2066,15 @@ def _main() -> None:
                 self,
                 message=t("file_dialog.add_files"),
                 defaultDir=start_dir,
-                wildcard=wildcard,
+                wildcard=self._files_wildcard,
                 style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST | wx.FD_MULTIPLE,
             ) as dialog:
                 if dialog.ShowModal() == wx.ID_CANCEL:
                     return
 
-                paths = [Path(p).expanduser() for p in dialog.GetPaths()]
-                added = 0
-                for path in paths:
-                    if path.exists() and path.is_file():
-                        self._add_input_path(path)
-                        added += 1
-                if added:
+                files = [Path(raw) for raw in dialog.GetPaths() if _is_regular_file(raw)]
+                self._add_input_paths(files)
+                if files:
                     self._persist_config()
 
         def _on_add_folder(self, _event: wx.CommandEvent) -> None:
@@ -1111,47 +2097,109 @@ def _main() -> None:
             )
             recursive = include_sub == wx.YES
 
-            candidates = folder.rglob("*") if recursive else folder.glob("*")
-            added = 0
-            skipped = 0
-            for path in sorted(candidates):
-                if not path.is_file():
-                    continue
-                if path.suffix.lower() not in _SUPPORTED_SUFFIXES:
-                    skipped += 1
-                    continue
-                self._add_input_path(path)
-                added += 1
-
-            if not added:
-                wx.MessageBox(
-                    t("info.no_supported_files"),
-                    _APP_NAME,
-                    wx.OK | wx.ICON_INFORMATION,
-                    self,
-                )
-                return
+            self._add_folder_in_background(folder, recursive=recursive)
+
+        def _add_folder_in_background(self, folder: Path, *, recursive: bool) -> None:
+            """
+            Walks the folder on a worker thread (it may be huge, or on a slow network
+            share) while a cancellable progress dialog keeps the window responsive.
+            Found files are handed to the UI thread in batches with `wx.CallAfter`.
+            """
+            cancel = threading.Event()
+            scan = _FolderScan(folder, recursive=recursive, stop=cancel)
+            progress = wx.ProgressDialog(
+                _APP_NAME,
+                t("progress.folder_scan", count=0),
+                parent=self,
+                style=wx.PD_APP_MODAL | wx.PD_CAN_ABORT | wx.PD_ELAPSED_TIME,
+            )
+            found = 0
+            finished = False
+
+            def finish() -> None:
+                nonlocal finished
+                finished = True
+                progress.Destroy()
+                if not found:
+                    if not cancel.is_set():
+                        wx.MessageBox(
+                            t("info.no_supported_files"),
+                            _APP_NAME,
+                            wx.OK | wx.ICON_INFORMATION,
+                            self,
+                        )
+                    return
+                if scan.skipped:
+                    warning = t("warn.skipped_unsupported_ext", count=scan.skipped)
+                    self.log.AppendText(f"{t('log.warn_prefix')}{warning}\n")
+                self._persist_config()
 
-            if skipped:
-                self.log.AppendText(
-                    f"{t('log.warn_prefix')}{t('warn.skipped_unsupported_ext', count=skipped)}\n"
-                )
-            self._persist_config()
+            def pulse() -> None:
+                if finished:
+                    return
+                keep_going, _skip = progress.Pulse(t("progress.folder_scan", count=found))
+                if keep_going:
+                    wx.CallLater(int(_FOLDER_ADD_INTERVAL_S * 1000), pulse)
+                else:
+                    cancel.set()
+                    finish()
+
+            def on_batch(batch: list[Path]) -> None:
+                nonlocal found
+                if not finished:
+                    self._add_input_paths(batch)
+                    found += len(batch)
+
+            def on_done() -> None:
+                if not finished:
+                    finish()
+
+            def run() -> None:
+                batch: list[Path] = []
+                last_post = time.monotonic()
+                try:
+                    for path in scan:
+                        batch.append(path)
+                        now = time.monotonic()
+                        if (
+                            len(batch) >= _FOLDER_ADD_BATCH
+                            or now - last_post >= _FOLDER_ADD_INTERVAL_S
+                        ):
+                            wx.CallAfter(on_batch, batch)
+                            batch = []
+                            last_post = now
+                finally:
+                    if batch:
+                        wx.CallAfter(on_batch, batch)
+                    wx.CallAfter(on_done)
+
+            threading.Thread(target=run, name="folder-scan", daemon=True).start()
+            pulse()
 
         def _on_remove_files(self, _event: wx.CommandEvent) -> None:
-            selections = list(self.files_list.GetSelections())
+            selections = set(self.files_list.selected_indices())
             if not selections:
                 return
-            for idx in sorted(selections, reverse=True):
-                if 0 <= idx < len(self._input_paths):
-                    self._input_paths.pop(idx)
-                self.files_list.Delete(idx)
-            self.SetStatusText(t("status.files_selected", count=len(self._input_paths)))
+            # Rebuild the lists in one pass rather than popping entries one by one.
+            kept = [i for i in range(len(self._input_paths)) if i not in selections]
+            for idx in selections:
+                if 0 <= idx < len(self._input_path_strs):
+                    self._input_path_keys.discard(self._input_path_strs[idx])
+            self._input_paths[:] = [self._input_paths[i] for i in kept]
+            self._input_path_strs[:] = [self._input_path_strs[i] for i in kept]
+            self.files_list.clear_selection()
+            self._show_file_count(immediate=True)
             self._persist_config()
 
         def _on_clear_files(self, _event: wx.CommandEvent) -> None:
             self._input_paths.clear()
-            self.files_list.Clear()
+            self._input_path_strs.clear()
+            self._input_path_keys.clear()
+            _duration_cache.cancel_pending()
+            if self._file_count_timer is not None:
+                self._file_count_timer.Stop()
+            self.files_list.clear_selection()
+            self.files_list.sync()
             self.SetStatusText(t("status.ready"))
             self._persist_config()
 
@@ -1190,213 +2238,31 @@ def _main() -> None:
             def _after_modal() -> None:
                 try:
                     self.Raise()
-                    self.Refresh()
+                    self.Refresh(eraseBackground=False)
                     self.Update()
-                    self.SendSizeEvent()
-                except Exception:
-                    pass
-                try:
-                    _win32_force_redraw(int(self.GetHandle()))
                 except Exception:
                     pass
+                if wx.Platform == "__WXMSW__":
+                    try:
+                        _win32_force_redraw(int(self.GetHandle()))
+                    except Exception:
+                        pass
                 try:
                     wx.YieldIfNeeded()
                 except Exception:
                     pass
                 _restore_focus()
 
-            dialog = wx.Dialog(
-                self,
-                title=t("dialog.advanced.title"),
-                style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER,
-            )
-            dialog.SetMinClientSize((740, 600))
-            panel = wx.Panel(dialog)
-
-            recog_box = wx.StaticBoxSizer(
-                wx.StaticBox(panel, label=t("dialog.advanced.group_recognition")),
-                wx.VERTICAL,
-            )
-            recog_grid = wx.FlexGridSizer(cols=2, vgap=8, hgap=8)
-            recog_grid.AddGrowableCol(1, 1)
-
-            sample_label = wx.StaticText(panel, label=t("adv.sample_seconds"))
-            sample = wx.SpinCtrl(
-                panel, min=5, max=60, initial=int(self._advanced.sample_duration_s)
-            )
-            sample.SetName(t("name.sample_seconds"))
-
-            sig_label = wx.StaticText(panel, label=t("adv.signature_seconds"))
-            sig = wx.SpinCtrl(panel, min=5, max=60, initial=int(self._advanced.sig_duration_s))
-            sig.SetName(t("name.signature_seconds"))
-
-            workers_label = wx.StaticText(panel, label=t("adv.workers"))
-            workers = wx.SpinCtrl(panel, min=1, max=32, initial=int(self._advanced.workers))
-            workers.SetName(t("name.workers"))
-
-            api_interval_label = wx.StaticText(panel, label=t("adv.min_api_interval"))
-            api_interval = wx.SpinCtrl(
-                panel, min=0, max=60, initial=int(self._advanced.min_api_interval_s)
-            )
-            api_interval.SetName(t("name.min_api_interval"))
-
-            timeout_label = wx.StaticText(panel, label=t("adv.recognize_timeout"))
-            timeout = wx.SpinCtrl(
-                panel, min=10, max=600, initial=int(self._advanced.recognize_timeout_s)
-            )
-            timeout.SetName(t("name.recognize_timeout"))
-
-            windows_label = wx.StaticText(panel, label=t("adv.max_windows"))
-            windows = wx.SpinCtrl(
-                panel, min=1, max=6, initial=int(self._advanced.max_windows_per_sample)
-            )
-            windows.SetName(t("name.max_windows"))
-
-            step_label = wx.StaticText(panel, label=t("adv.window_step"))
-            step = wx.SpinCtrl(panel, min=1, max=60, initial=int(self._advanced.window_step_s))
-            step.SetName(t("name.window_step"))
-
-            silence_label = wx.StaticText(panel, label=t("adv.silence_dbfs"))
-            silence = wx.TextCtrl(panel, value=str(self._advanced.silence_dbfs_threshold))
-            silence.SetName(t("name.silence_dbfs"))
-
-            debug = wx.CheckBox(panel, label=t("adv.debug_audio"))
-            debug.SetName(t("name.debug_audio"))
-            debug.SetValue(bool(self._advanced.debug_audio))
-
-            for label, ctrl in [
-                (sample_label, sample),
-                (sig_label, sig),
-                (workers_label, workers),
-                (api_interval_label, api_interval),
-                (timeout_label, timeout),
-                (windows_label, windows),
-                (step_label, step),
-                (silence_label, silence),
-            ]:
-                recog_grid.Add(label, 0, wx.ALIGN_CENTER_VERTICAL)
-                recog_grid.Add(ctrl, 0, wx.EXPAND)
-
-            recog_box.Add(recog_grid, 0, wx.ALL | wx.EXPAND, 8)
-            recog_box.Add(debug, 0, wx.LEFT | wx.RIGHT | wx.BOTTOM, 8)
-
-            http_box = wx.StaticBoxSizer(
-                wx.StaticBox(panel, label=t("dialog.advanced.group_http")),
-                wx.VERTICAL,
-            )
-            http_grid = wx.FlexGridSizer(cols=2, vgap=8, hgap=8)
-            http_grid.AddGrowableCol(1, 1)
-
-            device_label = wx.StaticText(panel, label="Device (URL):")
-            device = wx.TextCtrl(panel, value=self._advanced.shazam_device)
-            device.SetName("Device (URL)")
-
-            accept_label = wx.StaticText(panel, label=t("adv.accept_language"))
-            accept = wx.TextCtrl(panel, value=self._advanced.shazam_accept_language)
-            accept.SetName("Accept-Language")
-            accept.SetToolTip(t("tooltip.accept_language"))
-
-            ua_label = wx.StaticText(panel, label="User-Agent:")
-            ua = wx.TextCtrl(panel, value=self._advanced.shazam_user_agent)
-            ua.SetName("User-Agent")
-
-            platform_label = wx.StaticText(panel, label="X-Shazam-Platform:")
-            platform = wx.TextCtrl(panel, value=self._advanced.shazam_platform)
-            platform.SetName("X-Shazam-Platform")
-
-            appver_label = wx.StaticText(panel, label="X-Shazam-AppVersion:")
-            appver = wx.TextCtrl(panel, value=self._advanced.shazam_app_version)
-            appver.SetName("X-Shazam-AppVersion")
-
-            tz_label = wx.StaticText(panel, label="Time zone:")
-            tz = wx.TextCtrl(panel, value=self._advanced.shazam_time_zone)
-            tz.SetName("Time zone")
-
-            for label, ctrl in [
-                (device_label, device),
-                (accept_label, accept),
-                (ua_label, ua),
-                (platform_label, platform),
-                (appver_label, appver),
-                (tz_label, tz),
-            ]:
-                http_grid.Add(label, 0, wx.ALIGN_CENTER_VERTICAL)
-                http_grid.Add(ctrl, 0, wx.EXPAND)
-
-            http_box.Add(http_grid, 0, wx.ALL | wx.EXPAND, 8)
-
-            root = wx.BoxSizer(wx.VERTICAL)
-            root.Add(recog_box, 0, wx.ALL | wx.EXPAND, 12)
-            root.Add(http_box, 0, wx.LEFT | wx.RIGHT | wx.BOTTOM | wx.EXPAND, 12)
-
-            buttons = wx.StdDialogButtonSizer()
-            ok_btn = wx.Button(panel, wx.ID_OK)
-            cancel_btn = wx.Button(panel, wx.ID_CANCEL)
-            buttons.AddButton(ok_btn)
-            buttons.AddButton(cancel_btn)
-            buttons.Realize()
-            dialog.SetAffirmativeId(wx.ID_OK)
-            dialog.SetEscapeId(wx.ID_CANCEL)
-            ok_btn.SetDefault()
-
-            root.Add(buttons, 0, wx.ALL | wx.EXPAND, 12)
-            panel.SetSizer(root)
-
-            dialog_sizer = wx.BoxSizer(wx.VERTICAL)
-            dialog_sizer.Add(panel, 1, wx.EXPAND)
-            dialog.SetSizer(dialog_sizer)
-            dialog.Layout()
+            if self._advanced_dialog is None:
+                self._advanced_dialog = _AdvancedDialog(self)
+            dialog = self._advanced_dialog
+            dialog.load(self._advanced)
             dialog.CentreOnParent()
-
-            def on_ok(_evt: wx.CommandEvent) -> None:
-                sample_s = int(sample.GetValue())
-                sig_s = int(sig.GetValue())
-                if sig_s > sample_s:
-                    wx.MessageBox(
-                        t("adv.error.sig_gt_sample"),
-                        _APP_NAME,
-                        wx.OK | wx.ICON_ERROR,
-                        dialog,
-                    )
-                    return
-
-                try:
-                    silence_dbfs = float(silence.GetValue().strip().replace(",", "."))
-                except ValueError:
-                    wx.MessageBox(
-                        t("adv.error.invalid_silence"),
-                        _APP_NAME,
-                        wx.OK | wx.ICON_ERROR,
-                        dialog,
-                    )
-                    return
-
-                self._advanced.sample_duration_s = sample_s
-                self._advanced.sig_duration_s = sig_s
-                self._advanced.workers = int(workers.GetValue())
-                self._advanced.min_api_interval_s = int(api_interval.GetValue())
-                self._advanced.recognize_timeout_s = int(timeout.GetValue())
-                self._advanced.max_windows_per_sample = int(windows.GetValue())
-                self._advanced.window_step_s = int(step.GetValue())
-                self._advanced.silence_dbfs_threshold = silence_dbfs
-                self._advanced.debug_audio = bool(debug.GetValue())
-                self._advanced.shazam_device = device.GetValue().strip() or _SHAZAM_DEVICE
-                self._advanced.shazam_accept_language = accept.GetValue().strip()
-                self._advanced.shazam_user_agent = ua.GetValue().strip() or _SHAZAM_USER_AGENT
-                self._advanced.shazam_platform = platform.GetValue().strip() or _SHAZAM_PLATFORM
-                self._advanced.shazam_app_version = appver.GetValue().strip() or _SHAZAM_APP_VERSION
-                self._advanced.shazam_time_zone = tz.GetValue().strip() or _SHAZAM_TIME_ZONE
+            if dialog.ShowModal() == wx.ID_OK and dialog.result is not None:
+                # Replaced rather than mutated: a running scan keeps the settings it started with.
+                self._advanced = dialog.result
                 self._persist_config()
-                dialog.EndModal(wx.ID_OK)
-
-            ok_btn.Bind(wx.EVT_BUTTON, on_ok)
-            cancel_btn.Bind(wx.EVT_BUTTON, lambda _e: dialog.EndModal(wx.ID_CANCEL))
-            dialog.Bind(wx.EVT_CLOSE, lambda _e: dialog.EndModal(wx.ID_CANCEL))
-
-            dialog.ShowModal()
-            dialog.Destroy()
             wx.CallAfter(_after_modal)
-            wx.CallLater(50, _after_modal)
 
         def _on_scan(self, _event: wx.CommandEvent) -> None:
             if self._worker and self._worker.is_alive():
@@ -1428,7 +2294,11 @@ def _main() -> None:
             if country_idx != wx.NOT_FOUND and country_idx < len(self._country_codes):
                 endpoint_country = self._country_codes[country_idx]
 
-            input_paths = [p for p in self._input_paths if p.exists() and p.is_file()]
+            input_paths = [
+                path
+                for path, name in zip(self._input_paths, self._input_path_strs)
+                if _is_regular_file(name)
+            ]
             if not input_paths:
                 wx.MessageBox(
                     t("error.no_existing_files"),
@@ -1438,7 +2308,7 @@ def _main() -> None:
                 )
                 return
 
-            unknown_suffixes = [p for p in input_paths if p.suffix.lower() not in _SUPPORTED_SUFFIXES]
+            unknown_suffixes = [p for p in input_paths if not _is_supported(p.name)]
             if unknown_suffixes:
                 exts = sorted({p.suffix.lower() or "(brak)" for p in unknown_suffixes})
                 preview = ", ".join(exts[:8]) + ("..." if len(exts) > 8 else "")
@@ -1466,17 +2336,23 @@ def _main() -> None:
                     return
 
             used_outputs: set[Path] = set()
+            # Next " (n)" suffix to try per base name, so files sharing a name don't
+            # rescan every number already handed out.
+            next_suffix: dict[Path, int] = {}
             existing_outputs: list[Path] = []
             jobs: list[tuple[Path, Path]] = []
             for input_path in input_paths:
                 out_dir = output_override if output_override is not None else input_path.parent
                 out_path = out_dir / input_path.with_suffix(".txt").name
-                if output_override is not None:
+                if output_override is not None and out_path in used_outputs:
                     base = out_path
-                    n = 2
+                    n = next_suffix.get(base, 2)
+                    out_path = base.with_name(f"{base.stem} ({n}){base.suffix}")
+                    # Still check: "a (2).mp3" may already have claimed "a (2).txt".
                     while out_path in used_outputs:
-                        out_path = base.with_name(f"{base.stem} ({n}){base.suffix}")
                         n += 1
+                        out_path = base.with_name(f"{base.stem} ({n}){base.suffix}")
+                    next_suffix[base] = n + 1
                 used_outputs.add(out_path)
                 if out_path.exists():
                     existing_outputs.append(out_path)
@@ -1515,8 +2391,14 @@ def _main() -> None:
 
         def _on_stop(self, _event: wx.CommandEvent) -> None:
             self._stop_event.set()
+            self._wake_throttle()
             self.SetStatusText(t("status.stopping"))
 
+        def _wake_throttle(self) -> None:
+            throttle = self._throttle
+            if throttle is not None:
+                throttle.wake_all()
+
         def _worker_main(
             self,
             jobs: list[tuple[Path, Path]],
@@ -1527,38 +2409,59 @@ def _main() -> None:
         ) -> None:
             file_total = max(1, len(jobs))
             try:
-                for file_index, (input_path, output_file) in enumerate(jobs, start=1):
-                    if self._stop_event.is_set():
-                        break
-                    try:
-                        self._scan_one_file(
-                            input_path=input_path,
-                            output_file=output_file,
-                            interval_s=interval_s,
-                            language=language,
-                            endpoint_country=endpoint_country,
-                            advanced=advanced,
-                            file_index=file_index,
-                            file_total=file_total,
-                        )
-                    except FfmpegNotFoundError:
-                        raise
-                    except Exception as exc:
-                        self._events.put(("warn", f"{input_path.name}\t{exc}"))
+                if self._process_longest_first and len(jobs) > 1:
+                    # Scan the longest files first, by the durations already in the cache
+                    # (files not probed yet go last, in list order) so the scan never
+                    # waits on ffprobe to decide the order. The UI list keeps its order.
+                    durations = {path: _duration_cache.cached(path) or 0.0 for path, _ in jobs}
+                    jobs = sorted(jobs, key=lambda job: -durations[job[0]])
+                # The first file is probed right away; the rest are probed in the
+                # background while it scans, so their ffprobe runs are hidden too.
+                _duration_cache.prefetch([path for path, _ in jobs[1:]])
+
+                # One event loop thread serves every file of the scan, and files scanned
+                # with the same settings share one Shazam client (and its connections).
+                shazam_clients: dict[tuple[Any, ...], Any] = {}
+
+                async def _close_clients() -> None:
+                    for client in shazam_clients.values():
+                        await client.http_client.close()
+
+                with _LoopThread(on_close=_close_clients) as runner:
+                    for file_index, (input_path, output_file) in enumerate(jobs, start=1):
+                        if self._stop_event.is_set():
+                            break
+                        try:
+                            self._scan_one_file(
+                                input_path=input_path,
+                                output_file=output_file,
+                                interval_s=interval_s,
+                                language=language,
+                                endpoint_country=endpoint_country,
+                                advanced=advanced,
+                                file_index=file_index,
+                                file_total=file_total,
+                                runner=runner,
+                                shazam_clients=shazam_clients,
+                            )
+                        except FfmpegNotFoundError:
+                            raise
+                        except Exception as exc:
+                            self._post_event(("warn", f"{input_path.name}\t{exc}"))
 
                 if self._stop_event.is_set():
-                    self._events.put(("stopped", t("status.stopped")))
+                    self._post_event(("stopped", t("status.stopped")))
                 else:
-                    self._events.put(("done", t("status.done")))
+                    self._post_event(("done", t("status.done")))
             except FfmpegNotFoundError:
-                self._events.put(
+                self._post_event(
                     (
                         "error",
                         t("error.ffmpeg_missing"),
                     )
                 )
             except Exception as exc:
-                self._events.put(("error", str(exc)))
+                self._post_event(("error", str(exc)))
 
         def _scan_one_file(
             self,
@@ -1571,6 +2474,8 @@ def _main() -> None:
             advanced: _AdvancedSettings,
             file_index: int,
             file_total: int,
+            runner: _LoopThread,
+            shazam_clients: dict[tuple[Any, ...], Any],
         ) -> None:
             language = language.strip() or _SHAZAM_URL_LANGUAGE
             endpoint_country = endpoint_country.strip().upper() or _SHAZAM_ENDPOINT_COUNTRY
@@ -1593,11 +2498,11 @@ def _main() -> None:
             shazam_time_zone = advanced.shazam_time_zone.strip() or _SHAZAM_TIME_ZONE
 
             try:
-                duration_s = probe_duration_seconds(input_path)
+                duration_s = _duration_cache.probe(input_path)
                 total_samples = (
                     max(1, math.ceil(duration_s / interval_s)) if duration_s is not None else None
                 )
-                self._events.put(
+                self._post_event(
                     (
                         "meta",
                         {
@@ -1616,7 +2521,7 @@ def _main() -> None:
                         },
                     )
                 )
-                self._events.put(
+                self._post_event(
                     (
                         "status",
                         t(
@@ -1635,187 +2540,101 @@ def _main() -> None:
                 error_count = 0
                 rate_limit_count = 0
 
-                class _AdaptiveThrottle:
-                    def __init__(self, base_interval_s: float) -> None:
-                        self._lock = threading.Lock()
-                        self._next_allowed = 0.0
-                        self._freeze_until = 0.0
-                        self._base_interval_s = base_interval_s
-                        self._min_interval_s = base_interval_s
-                        self._rate_limit_hits = 0
-                        self._successes_since_limit = 0
-
-                    def _compute_wait(self) -> float:
-                        now = time.monotonic()
-                        return max(self._freeze_until - now, self._next_allowed - now, 0.0)
-
-                    def peek_wait_seconds(self) -> int:
-                        with self._lock:
-                            wait = self._compute_wait()
-                        return int(math.ceil(wait)) if wait > 0 else 0
-
-                    def wait_for_slot(self) -> None:
-                        while True:
-                            with self._lock:
-                                wait = self._compute_wait()
-                                if wait <= 0:
-                                    now = time.monotonic()
-                                    self._next_allowed = now + self._min_interval_s
-                                    return
-                            time.sleep(min(wait, 1.0))
-
-                    def note_success(self) -> None:
-                        with self._lock:
-                            if self._rate_limit_hits == 0:
-                                return
-                            self._successes_since_limit += 1
-                            if self._successes_since_limit >= 10:
-                                self._successes_since_limit = 0
-                                self._min_interval_s = max(
-                                    self._base_interval_s, self._min_interval_s * 0.8
-                                )
-
-                    def note_rate_limit(self, retry_after_s: int | None) -> int:
-                        with self._lock:
-                            now = time.monotonic()
-                            self._rate_limit_hits += 1
-                            self._successes_since_limit = 0
-
-                            if retry_after_s is None:
-                                retry_after_s = min(300, 5 * (2 ** min(self._rate_limit_hits, 6)))
-                            self._freeze_until = max(self._freeze_until, now + retry_after_s)
-                            self._min_interval_s = min(
-                                max(self._min_interval_s * 2, self._base_interval_s), 60.0
-                            )
-
-                            wait = self._compute_wait()
-                        return int(math.ceil(wait)) if wait > 0 else 0
-
-                    def note_near_rate_limit(self) -> None:
-                        with self._lock:
-                            if self._rate_limit_hits == 0:
-                                self._rate_limit_hits = 1
-                            self._successes_since_limit = 0
-                            self._min_interval_s = min(
-                                max(self._min_interval_s, self._base_interval_s), 60.0
-                            )
-
                 sample_duration_s = max(1, min(60, int(sample_duration_s)))
                 segment_duration_s = max(1, min(sample_duration_s, int(sig_duration_s)))
 
                 base_interval_s = max(0.0, min(60.0, float(min_api_interval_s)))
                 throttle = _AdaptiveThrottle(base_interval_s)
+                self._throttle = throttle  # so that Stop can wake its waiters
 
-                thread_state = threading.local()
-
-                def _ensure_thread_runtime() -> tuple[Any, Any, Any]:
-                    loop = getattr(thread_state, "loop", None)
-                    if loop is None or getattr(loop, "is_closed", lambda: False)():
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        thread_state.loop = loop
-                        thread_state.shazam = None
-                        thread_state.segment_duration_s = None
-                        thread_state.language = None
-                        thread_state.endpoint_country = None
-                        thread_state.accept_language = None
-                        thread_state.device = None
-                        thread_state.platform = None
-                        thread_state.app_version = None
-                        thread_state.user_agent = None
-                        thread_state.time_zone = None
-                    else:
-                        asyncio.set_event_loop(loop)
-
-                    shazam = getattr(thread_state, "shazam", None)
-                    if (
-                        shazam is None
-                        or getattr(thread_state, "segment_duration_s", None) != segment_duration_s
-                        or getattr(thread_state, "language", None) != language
-                        or getattr(thread_state, "endpoint_country", None) != endpoint_country
-                        or getattr(thread_state, "accept_language", None) != accept_language
-                        or getattr(thread_state, "device", None) != shazam_device
-                        or getattr(thread_state, "platform", None) != shazam_platform
-                        or getattr(thread_state, "app_version", None) != shazam_app_version
-                        or getattr(thread_state, "user_agent", None) != shazam_user_agent
-                        or getattr(thread_state, "time_zone", None) != shazam_time_zone
-                    ):
-                        shazam = _PinnedShazam(
-                            language=language,
-                            endpoint_country=endpoint_country,
-                            device=shazam_device,
-                            platform=shazam_platform,
-                            app_version=shazam_app_version,
-                            user_agent=shazam_user_agent,
-                            time_zone=shazam_time_zone,
-                            accept_language=accept_language,
-                            segment_duration_seconds=segment_duration_s,
-                        )
-                        thread_state.shazam = shazam
-                        thread_state.segment_duration_s = segment_duration_s
-                        thread_state.language = language
-                        thread_state.endpoint_country = endpoint_country
-                        thread_state.accept_language = accept_language
-                        thread_state.device = shazam_device
-                        thread_state.platform = shazam_platform
-                        thread_state.app_version = shazam_app_version
-                        thread_state.user_agent = shazam_user_agent
-                        thread_state.time_zone = shazam_time_zone
-
-                    return loop, shazam, getattr(shazam, "http_client", None)
-
-                def _parse_retry_after_seconds(value: str | None) -> int | None:
-                    if not value:
-                        return None
-                    try:
-                        seconds = int(value.strip())
-                    except ValueError:
-                        return None
-                    if seconds <= 0:
-                        return None
-                    return seconds
+                # One client for the whole scan: worker threads hand their requests to a
+                # shared event loop (see `_LoopThread`) instead of each running its own.
+                # It's closed by `_worker_main` once the last file is done.
+                shazam_key = (
+                    language,
+                    endpoint_country,
+                    shazam_device,
+                    shazam_platform,
+                    shazam_app_version,
+                    shazam_user_agent,
+                    shazam_time_zone,
+                    accept_language,
+                    segment_duration_s,
+                    workers,
+                )
+                shazam = shazam_clients.get(shazam_key)
+                if shazam is None:
+                    shazam = _PinnedShazam(
+                        language=language,
+                        endpoint_country=endpoint_country,
+                        device=shazam_device,
+                        platform=shazam_platform,
+                        app_version=shazam_app_version,
+                        user_agent=shazam_user_agent,
+                        time_zone=shazam_time_zone,
+                        accept_language=accept_language,
+                        segment_duration_seconds=segment_duration_s,
+                        max_connections=workers,
+                    )
+                    shazam_clients[shazam_key] = shazam
+                http_client = shazam.http_client
+                fingerprint_variant = "".join(
+                    f"\0{value}"
+                    for value in (
+                        shazam_device,
+                        shazam_platform,
+                        shazam_app_version,
+                        shazam_user_agent,
+                        accept_language,
+                    )
+                ).encode("utf-8")
+                request_slots = asyncio.Semaphore(workers)
+
+                async def _make_sig(audio_bytes: bytes | bytearray) -> Any:
+                    return await asyncio.wait_for(
+                        shazam.core_recognizer.recognize_bytes(value=audio_bytes),
+                        timeout=recognize_timeout_s,
+                    )
+
+                async def _send_recognize(sig: Any) -> _RecognizeResult:
+                    async with request_slots:
+                        trace = http_client.begin_trace()
+                        try:
+                            raw = await asyncio.wait_for(
+                                shazam.send_recognize_request_v2(sig=sig),
+                                timeout=recognize_timeout_s,
+                            )
+                        except Exception as exc:
+                            return _RecognizeResult.from_trace(None, exc, trace)
+                        return _RecognizeResult.from_trace(raw, None, trace)
 
                 def _recognize(
-                    audio_bytes: bytes, *, label_offset_s: int
+                    audio_bytes: bytes | bytearray, *, label_offset_s: int
                 ) -> tuple[Any | None, str | None]:
                     nonlocal rate_limit_count
-                    loop, shazam, http_client = _ensure_thread_runtime()
-
-                    def _http_snapshot() -> tuple[
-                        list[tuple[int, int]] | None, int | None, str | None, str | None
-                    ]:
-                        attempts: list[tuple[int, int]] | None = (
-                            getattr(http_client, "attempts", None) if http_client else None
-                        )
-                        status: int | None = (
-                            getattr(http_client, "last_status", None) if http_client else None
-                        )
-                        retry_after: str | None = None
-                        content_type: str | None = None
-                        if http_client and (headers := getattr(http_client, "last_headers", None)):
-                            retry_after = headers.get("Retry-After")
-                            content_type = headers.get("Content-Type")
-                        return attempts, status, retry_after, content_type
-
-                    def _attempt_chain(attempts: list[tuple[int, int]] | None) -> str:
-                        if not attempts:
-                            return ""
-                        chain = "->".join(str(code) for _attempt, code in attempts)
-                        return f" ({chain})"
 
                     try:
-                        async def _make_sig() -> Any:
-                            return await shazam.core_recognizer.recognize_bytes(value=audio_bytes)
-
-                        sig = loop.run_until_complete(
-                            asyncio.wait_for(_make_sig(), timeout=recognize_timeout_s)
-                        )
+                        sig = runner.run(_make_sig(audio_bytes))
                     except Exception as exc:
                         message = str(exc).strip()
                         if message:
                             return None, f"{type(exc).__name__}: {message}"
                         return None, type(exc).__name__
 
+                    # Identical audio gives an identical signature; answer repeats from disk.
+                    # The client settings are part of the key, as they can change the answer.
+                    try:
+                        sig_hash = hashlib.sha256(sig.signature.uri.encode("ascii"))
+                    except (AttributeError, UnicodeEncodeError):
+                        sig_key = None
+                    else:
+                        sig_hash.update(fingerprint_variant)
+                        sig_key = sig_hash.digest()
+                    if sig_key is not None:
+                        cached = _fingerprint_cache.get(sig_key, language, endpoint_country)
+                        if cached is not None:
+                            return cached, None
+
                     non_rate_limit_attempts = 0
                     while True:
                         if self._stop_event.is_set():
@@ -1823,19 +2642,18 @@ def _main() -> None:
 
                         wait_s = throttle.peek_wait_seconds()
                         if wait_s >= 5:
-                            self._events.put(
+                            self._post_event(
                                 ("status", t("status.api_limit_pause", seconds=wait_s))
                             )
-                        throttle.wait_for_slot()
+                        if not throttle.wait_for_slot(self._stop_event):
+                            return None, "stopped"
 
-                        try:
-                            coro = shazam.send_recognize_request_v2(sig=sig)
-                            raw = loop.run_until_complete(
-                                asyncio.wait_for(coro, timeout=recognize_timeout_s)
-                            )
-                        except Exception as exc:
-                            attempts, status, retry_after, content_type = _http_snapshot()
-                            chain = _attempt_chain(attempts)
+                        result = runner.run(_send_recognize(sig))
+                        raw, exc = result.raw, result.error
+                        attempts, status, chain = result.attempts, result.status, result.chain
+                        retry_after = result.retry_after
+                        if exc is not None:
+                            content_type = result.content_type
 
                             extra_bits: list[str] = []
                             if status is not None:
@@ -1874,7 +2692,7 @@ def _main() -> None:
                                     extra_info += f" Retry-After={retry_after}"
                                 if content_type:
                                     extra_info += f" Content-Type={content_type}"
-                                self._events.put(
+                                self._post_event(
                                     (
                                         "warn",
                                         t(
@@ -1894,22 +2712,16 @@ def _main() -> None:
                                 or "decode json" in message.lower()
                             )
                             non_rate_limit_attempts += 1
-                            if (
-                                transient
-                                and non_rate_limit_attempts < 6
-                                and not self._stop_event.is_set()
-                            ):
+                            if transient and non_rate_limit_attempts < 6:
                                 throttle.note_near_rate_limit()
-                                time.sleep(min(2.0**non_rate_limit_attempts, 60.0))
+                                # Cut short by Stop; the loop top then returns "stopped".
+                                self._stop_event.wait(min(2.0**non_rate_limit_attempts, 60.0))
                                 continue
 
                             return None, message
 
-                        attempts, status, retry_after, _content_type = _http_snapshot()
-                        chain = _attempt_chain(attempts)
-
                         if attempts and any(code == 429 for _attempt, code in attempts):
-                            self._events.put(
+                            self._post_event(
                                 (
                                     "warn",
                                     t(
@@ -1927,7 +2739,7 @@ def _main() -> None:
                             wait_s = throttle.note_rate_limit(
                                 _parse_retry_after_seconds(retry_after)
                             )
-                            self._events.put(
+                            self._post_event(
                                 (
                                     "warn",
                                     t(
@@ -1958,6 +2770,8 @@ def _main() -> None:
                             return None, diag
 
                         throttle.note_success()
+                        if sig_key is not None:
+                            _fingerprint_cache.put(sig_key, language, endpoint_country, raw)
                         return raw, None
 
                     return None, t("error.recognize_failed")
@@ -1965,104 +2779,106 @@ def _main() -> None:
                 audio_meta_lock = threading.Lock()
                 audio_meta_logged = False
 
-                def _rms_dbfs(samples: bytes, *, sampwidth: int) -> float:
-                    if not samples:
-                        return float("-inf")
-                    rms = audioop.rms(samples, sampwidth)
-                    if rms <= 0:
-                        return float("-inf")
-                    max_amp = float((1 << (8 * sampwidth - 1)) - 1)
-                    return 20.0 * math.log10(rms / max_amp)
-
                 def _rank_window_starts_by_rms(
-                    wav_bytes: bytes,
+                    wav_bytes: bytes | bytearray,
+                    layout: WavLayout | None,
                     *,
                     window_duration_s: int,
                 ) -> tuple[list[int], str, float, float]:
-                    try:
-                        with wave.open(BytesIO(wav_bytes), "rb") as wav_in:
-                            channels = wav_in.getnchannels()
-                            sampwidth = wav_in.getsampwidth()
-                            framerate = wav_in.getframerate()
-                            declared_nframes = wav_in.getnframes()
-                            frames = wav_in.readframes(declared_nframes)
-                    except wave.Error:
+                    if layout is None:
                         return [0], "?", float("-inf"), float("-inf")
 
-                    frame_size = channels * sampwidth
-                    if frame_size <= 0:
-                        return [0], "?", float("-inf"), float("-inf")
+                    channels = layout.channels
+                    sampwidth = layout.sampwidth
+                    framerate = layout.framerate
+                    frame_size = layout.frame_size
 
-                    actual_nframes = len(frames) // frame_size
+                    actual_nframes = layout.nframes
                     if actual_nframes <= 0:
                         duration_s = 0.0
                         meta = f"{framerate} Hz, {channels} ch, s{sampwidth * 8}le, {duration_s:.1f}s"
                         return [0], meta, float("-inf"), float("-inf")
 
-                    frames = frames[: actual_nframes * frame_size]
+                    # A view into the sample's buffer; the PCM is never copied out of it.
+                    data_start = layout.data_offset
+                    data_end = data_start + actual_nframes * frame_size
+                    frames = memoryview(wav_bytes)[data_start:data_end]
 
                     duration_s = float(actual_nframes) / float(framerate) if framerate else 0.0
                     meta = f"{framerate} Hz, {channels} ch, s{sampwidth * 8}le, {duration_s:.1f}s"
-                    overall_dbfs = _rms_dbfs(frames, sampwidth=sampwidth)
+
+                    dtype = _PCM_DTYPES.get(sampwidth)
+                    if dtype is None:
+                        return [0], meta, float("-inf"), float("-inf")
+
+                    import numpy as np
+
+                    # Decode once; channels stay interleaved, which doesn't matter for RMS.
+                    x = np.frombuffer(frames, dtype=dtype).astype(np.float32)
+                    overall_dbfs = _mean_square_dbfs(
+                        float(np.dot(x, x)) / x.size, sampwidth=sampwidth
+                    )
 
                     window_frames = int(window_duration_s * framerate)
                     if window_frames <= 0 or window_frames >= actual_nframes:
                         return [0], meta, overall_dbfs, overall_dbfs
 
-                    step_frames = max(1, int(window_step_s * framerate))
-                    candidates: list[tuple[int, int]] = []
-
-                    last_start = actual_nframes - window_frames
-                    for start_frame in range(0, last_start + 1, step_frames):
-                        start = start_frame * frame_size
-                        end = (start_frame + window_frames) * frame_size
-                        window = frames[start:end]
-                        rms = audioop.rms(window, sampwidth) if window else 0
-                        candidates.append((int(rms), int(start_frame)))
-
-                    candidates.sort(key=lambda item: (-item[0], item[1]))
-                    best_rms = candidates[0][0] if candidates else 0
-                    best_dbfs = (
-                        float("-inf")
-                        if best_rms <= 0
-                        else 20.0
-                        * math.log10(best_rms / float((1 << (8 * sampwidth - 1)) - 1))
+                    # No window can hold more than the whole sample's energy, so a quiet enough
+                    # sample is silent in every window; skip ranking it altogether.
+                    loudest_possible_dbfs = overall_dbfs + 10.0 * math.log10(
+                        actual_nframes / window_frames
                     )
+                    if loudest_possible_dbfs < silence_dbfs_threshold:
+                        return [0], meta, overall_dbfs, overall_dbfs
 
-                    starts: list[int] = []
-                    seen: set[int] = set()
-                    for _rms, start_frame in candidates:
-                        start_s = int(start_frame / framerate) if framerate else 0
-                        if start_s in seen:
-                            continue
-                        seen.add(start_s)
-                        starts.append(start_s)
-                        if len(starts) >= max_windows_per_sample:
-                            break
-
-                    if not starts:
-                        starts = [0]
+                    step_frames = max(1, int(window_step_s * framerate))
 
-                    return starts, meta, overall_dbfs, best_dbfs
+                    # Energies of every candidate window, summing each sample's square once
+                    # rather than once per (heavily overlapping) window it belongs to.
+                    window_len = window_frames * channels
+                    energies = window_energies(x, window_len, step_frames * channels)
+                    # Window k starts at k * window_step_s seconds (the step is a whole number
+                    # of seconds), so the loudest few are distinct starts with no dedup needed.
+                    order = loudest_windows(energies, max_windows_per_sample)
+                    best_dbfs = _mean_square_dbfs(
+                        float(energies[order[0]]) / window_len, sampwidth=sampwidth
+                    )
+                    return (order * window_step_s).tolist(), meta, overall_dbfs, best_dbfs
 
                 def _process_sample(offset_s: int) -> tuple[int, str | None, str | None]:
                     if self._stop_event.is_set():
                         return offset_s, None, "stopped"
 
                     try:
-                        audio = extract_wav_segment(
-                            input_path,
-                            start_s=offset_s,
-                            duration_s=sample_duration_s,
-                        )
+                        if wav_source is not None:
+                            # Mixed down while copied, rather than in every window sent to Shazam.
+                            audio = slice_wav_bytes(
+                                wav_source,
+                                start_s=offset_s,
+                                duration_s=sample_duration_s,
+                                layout=source_layout,
+                                mono=True,
+                            )
+                        else:
+                            audio = extract_wav_segment(
+                                input_path,
+                                start_s=offset_s,
+                                duration_s=sample_duration_s,
+                                stop_event=self._stop_event,
+                            )
                     except Exception as exc:
                         return offset_s, None, str(exc)
 
-                    if audio is None or self._stop_event.is_set():
-                        return offset_s, None, "eof" if audio is None else None
+                    if self._stop_event.is_set():
+                        return offset_s, None, "stopped"
+                    if audio is None:
+                        return offset_s, None, "eof"
 
+                    # Parsed once; ranking and every window slice below reuse it.
+                    audio_layout = parse_wav_layout(audio)
                     window_starts, audio_meta, overall_dbfs, best_dbfs = _rank_window_starts_by_rms(
                         audio,
+                        audio_layout,
                         window_duration_s=segment_duration_s,
                     )
 
@@ -2070,7 +2886,7 @@ def _main() -> None:
                     with audio_meta_lock:
                         if not audio_meta_logged:
                             audio_meta_logged = True
-                            self._events.put(
+                            self._post_event(
                                 (
                                     "warn",
                                     f"{format_hms(offset_s)}\tAudio: {audio_meta}, "
@@ -2080,7 +2896,7 @@ def _main() -> None:
 
                         if best_dbfs < silence_dbfs_threshold:
                             if debug_audio:
-                                self._events.put(
+                                self._post_event(
                                     (
                                         "warn",
                                         t(
@@ -2097,7 +2913,10 @@ def _main() -> None:
                             return offset_s, None, "stopped"
 
                         window_audio = slice_wav_bytes(
-                            audio, start_s=int(rel_start_s), duration_s=segment_duration_s
+                            audio,
+                            start_s=int(rel_start_s),
+                            duration_s=segment_duration_s,
+                            layout=audio_layout,
                         )
                         if window_audio is None:
                             continue
@@ -2120,19 +2939,41 @@ def _main() -> None:
 
                     return offset_s, None, None
 
-                with output_file.open("w", encoding="utf-8") as out:
+                with (
+                    output_file.open("w", encoding="utf-8") as out,
+                    open_pcm_wav(input_path) as wav_source,
+                ):
+                    source_layout = parse_wav_layout(wav_source) if wav_source is not None else None
+                    unflushed = 0
+                    last_flush_at = time.monotonic()
+
+                    def _write_match(sample_offset: int, line: str) -> None:
+                        nonlocal unflushed, last_flush_at
+                        entry = f"{format_hms(sample_offset)}\t{line}"
+                        out.write(entry + "\n")
+                        unflushed += 1
+                        now = time.monotonic()
+                        if (
+                            unflushed >= _OUTPUT_FLUSH_EVERY_MATCHES
+                            or now - last_flush_at >= _OUTPUT_FLUSH_INTERVAL_S
+                        ):
+                            out.flush()
+                            unflushed = 0
+                            last_flush_at = now
+                        self._post_event(("match", entry))
+
                     if total_samples is None:
                         offset_s = 0
                         done = 0
                         while not self._stop_event.is_set():
-                            self._events.put(
+                            self._post_event(
                                 ("status", t("status.sample", timestamp=format_hms(offset_s)))
                             )
                             sample_offset, line, error = _process_sample(offset_s)
                             if error == "eof":
                                 break
                             if error and error != "stopped":
-                                self._events.put(("warn", f"{format_hms(sample_offset)}\t{error}"))
+                                self._post_event(("warn", f"{format_hms(sample_offset)}\t{error}"))
                                 error_count += 1
                                 if "HTTP 429" in error:
                                     rate_limit_count += 1
@@ -2141,16 +2982,12 @@ def _main() -> None:
                                 matches_count += 1
                                 if line not in seen:
                                     seen.add(line)
-                                    out.write(f"{format_hms(sample_offset)}\t{line}\n")
-                                    out.flush()
-                                    self._events.put(
-                                        ("match", f"{format_hms(sample_offset)}\t{line}")
-                                    )
+                                    _write_match(sample_offset, line)
                             elif not error:
                                 nomatch_count += 1
 
                             done += 1
-                            self._events.put(
+                            self._post_event(
                                 (
                                     "progress",
                                     {
@@ -2169,6 +3006,10 @@ def _main() -> None:
                         max_inflight = max(4, workers * 3)
                         executor: ThreadPoolExecutor | None = None
                         inflight: dict[Future[tuple[int, str | None, str | None]], int] = {}
+                        # Finished futures report themselves here, in completion order.
+                        completed: SimpleQueue[Future[tuple[int, str | None, str | None]]] = (
+                            SimpleQueue()
+                        )
 
                         try:
                             executor = ThreadPoolExecutor(max_workers=workers)
@@ -2177,6 +3018,7 @@ def _main() -> None:
                                 offset = idx * interval_s
                                 fut = executor.submit(_process_sample, offset)
                                 inflight[fut] = idx
+                                fut.add_done_callback(completed.put)
 
                             next_submit = 0
                             while next_submit < total_samples and len(inflight) < max_inflight:
@@ -2186,78 +3028,67 @@ def _main() -> None:
                             done = 0
                             eof_seen = False
                             while inflight and done < total_samples and not self._stop_event.is_set():
-                                done_set, _pending = wait_futures(
-                                    inflight.keys(),
-                                    timeout=0.25,
-                                    return_when=FIRST_COMPLETED,
-                                )
-                                if not done_set:
+                                try:
+                                    fut = completed.get(timeout=_STOP_POLL_INTERVAL_S)
+                                except Empty:
+                                    continue
+                                if inflight.pop(fut, None) is None:
                                     continue
+                                sample_offset, line, error = fut.result()
+                                if error == "eof":
+                                    eof_seen = True
 
-                                for fut in done_set:
-                                    inflight.pop(fut, None)
-                                    sample_offset, line, error = fut.result()
-                                    if error == "eof":
-                                        eof_seen = True
-
-                                    if error and error != "stopped" and error != "eof":
-                                        self._events.put(
-                                            ("warn", f"{format_hms(sample_offset)}\t{error}")
-                                        )
-                                        error_count += 1
-                                        if "HTTP 429" in error:
-                                            rate_limit_count += 1
-
-                                    if line:
-                                        matches_count += 1
-                                        if line not in seen:
-                                            seen.add(line)
-                                            out.write(f"{format_hms(sample_offset)}\t{line}\n")
-                                            out.flush()
-                                            self._events.put(
-                                                ("match", f"{format_hms(sample_offset)}\t{line}")
-                                            )
-                                    elif not error:
-                                        nomatch_count += 1
-
-                                    done += 1
-                                    elapsed_s = int(time.monotonic() - started)
-                                    eta_s: int | None = None
-                                    if done > 0 and not eof_seen:
-                                        remaining = total_samples - done
-                                        if remaining > 0:
-                                            eta_s = int((elapsed_s / done) * remaining)
-
-                                    self._events.put(
-                                        (
-                                            "progress",
-                                            {
-                                                "done": done,
-                                                "total": total_samples,
-                                                "elapsed_s": elapsed_s,
-                                                "eta_s": eta_s,
-                                                "offset_s": sample_offset,
-                                                "matches": matches_count,
-                                                "nomatch": nomatch_count,
-                                                "errors": error_count,
-                                                "rate_limits": rate_limit_count,
-                                            },
-                                        )
+                                if error and error != "stopped" and error != "eof":
+                                    self._post_event(
+                                        ("warn", f"{format_hms(sample_offset)}\t{error}")
                                     )
+                                    error_count += 1
+                                    if "HTTP 429" in error:
+                                        rate_limit_count += 1
+
+                                if line:
+                                    matches_count += 1
+                                    if line not in seen:
+                                        seen.add(line)
+                                        _write_match(sample_offset, line)
+                                elif not error:
+                                    nomatch_count += 1
+
+                                done += 1
+                                elapsed_s = int(time.monotonic() - started)
+                                eta_s: int | None = None
+                                if done > 0 and not eof_seen:
+                                    remaining = total_samples - done
+                                    if remaining > 0:
+                                        eta_s = int((elapsed_s / done) * remaining)
+
+                                self._post_event(
+                                    (
+                                        "progress",
+                                        {
+                                            "done": done,
+                                            "total": total_samples,
+                                            "elapsed_s": elapsed_s,
+                                            "eta_s": eta_s,
+                                            "offset_s": sample_offset,
+                                            "matches": matches_count,
+                                            "nomatch": nomatch_count,
+                                            "errors": error_count,
+                                            "rate_limits": rate_limit_count,
+                                        },
+                                    )
+                                )
 
-                                    if eof_seen or self._stop_event.is_set():
-                                        break
-
-                                    while (
-                                        next_submit < total_samples
-                                        and len(inflight) < max_inflight
-                                        and not self._stop_event.is_set()
-                                    ):
-                                        _submit(next_submit)
-                                        next_submit += 1
-
-                                if eof_seen:
+                                if eof_seen or self._stop_event.is_set():
                                     break
+
+                                while (
+                                    next_submit < total_samples
+                                    and len(inflight) < max_inflight
+                                    and not self._stop_event.is_set()
+                                ):
+                                    _submit(next_submit)
+                                    next_submit += 1
                         finally:
                             if executor is not None:
                                 for fut in inflight.keys():
@@ -2265,7 +3096,7 @@ def _main() -> None:
                                 executor.shutdown(wait=True, cancel_futures=True)
 
                 if self._stop_event.is_set():
-                    self._events.put(
+                    self._post_event(
                         (
                             "info",
                             t(
@@ -2277,7 +3108,7 @@ def _main() -> None:
                         )
                     )
                 else:
-                    self._events.put(
+                    self._post_event(
                         (
                             "info",
                             t(
@@ -2293,191 +3124,247 @@ def _main() -> None:
             except Exception:
                 raise
 
-        def _on_timer(self, _event: wx.TimerEvent) -> None:
-            while True:
-                try:
-                    kind, payload = self._events.get_nowait()
-                except Empty:
-                    break
-
-                if kind == "meta":
-                    file_index = payload.get("file_index")
-                    file_total = payload.get("file_total")
-                    input_file = payload.get("input_file")
-                    self._scan_file_index = int(file_index) if file_index is not None else None
-                    self._scan_file_total = int(file_total) if file_total is not None else None
-                    self._scan_file_name = (
-                        Path(str(input_file)).name if input_file is not None else None
-                    )
+        def _post_event(self, event: tuple[str, Any]) -> None:
+            """
+            Called from worker threads. Events are handed to the UI thread with
+            `wx.CallAfter`; bursts of "progress" events collapse into the latest one,
+            and bursts of log lines are appended to the log in one go.
+            """
+            if self._closing:
+                return
+            kind, payload = event
+            if kind in {"match", "info", "warn"}:
+                line = f"{t('log.warn_prefix')}{payload}\n" if kind == "warn" else f"{payload}\n"
+                with self._log_lock:
+                    scheduled = bool(self._pending_log)
+                    self._pending_log.append(line)
+                if not scheduled:
+                    wx.CallAfter(self._flush_log)
+                return
+            if kind == "progress":
+                with self._progress_lock:
+                    scheduled = self._pending_progress is not None
+                    self._pending_progress = payload
+                if not scheduled:
+                    wx.CallAfter(self._flush_progress)
+                return
+            wx.CallAfter(self._on_worker_event, kind, payload)
 
-                    file_prefix = ""
-                    if self._scan_file_index and self._scan_file_total:
-                        file_prefix = f"[{self._scan_file_index}/{self._scan_file_total}] "
-                    if self._scan_file_name:
-                        file_prefix = f"{file_prefix}{self._scan_file_name}: "
-
-                    duration_s = payload.get("duration_s")
-                    self._scan_duration_s = int(duration_s) if duration_s is not None else None
-                    self._scan_elapsed_s = 0
-                    self._scan_matches = 0
-                    self._scan_nomatch = 0
-                    self._scan_errors = 0
-                    self._scan_rate_limits = 0
-                    if duration_s is None:
-                        self.progress.Pulse()
-                    else:
-                        self.progress.SetValue(0)
-                    workers = payload.get("workers")
-                    total_samples = payload.get("total_samples")
-                    self._scan_total_samples = int(total_samples) if total_samples else None
-                    if total_samples:
-                        duration_label = (
-                            format_hms(self._scan_duration_s) if self._scan_duration_s else "?"
+        def _take_pending_progress(self) -> dict[str, Any] | None:
+            with self._progress_lock:
+                payload, self._pending_progress = self._pending_progress, None
+            return payload
+
+        def _flush_progress(self) -> None:
+            if self._closing:
+                return
+            wait_s = self._last_progress_at + _PROGRESS_UI_INTERVAL_S - time.monotonic()
+            if wait_s > 0:
+                wx.CallLater(max(1, int(wait_s * 1000)), self._flush_progress)
+                return
+            payload = self._take_pending_progress()
+            if payload is not None:
+                self._on_worker_event("progress", payload)
+
+        def _flush_log(self) -> None:
+            if self._closing:
+                return
+            with self._log_lock:
+                lines, self._pending_log = self._pending_log, []
+            if lines:
+                self.log.AppendText("".join(lines))
+
+        def _on_worker_event(self, kind: str, payload: Any) -> None:
+            if self._closing:
+                return
+            # Log lines posted before this event go in first.
+            self._flush_log()
+            if kind == "progress":
+                self._last_progress_at = time.monotonic()
+            elif (pending := self._take_pending_progress()) is not None:
+                # Apply the latest progress first, so it can't land after e.g. "done".
+                self._on_worker_event("progress", pending)
+
+            if kind == "meta":
+                file_index = payload.get("file_index")
+                file_total = payload.get("file_total")
+                input_file = payload.get("input_file")
+                self._scan_file_index = int(file_index) if file_index is not None else None
+                self._scan_file_total = int(file_total) if file_total is not None else None
+                self._scan_file_name = (
+                    Path(str(input_file)).name if input_file is not None else None
+                )
+
+                file_prefix = ""
+                if self._scan_file_index and self._scan_file_total:
+                    file_prefix = f"[{self._scan_file_index}/{self._scan_file_total}] "
+                if self._scan_file_name:
+                    file_prefix = f"{file_prefix}{self._scan_file_name}: "
+
+                duration_s = payload.get("duration_s")
+                self._scan_duration_s = int(duration_s) if duration_s is not None else None
+                self._scan_elapsed_s = 0
+                self._scan_matches = 0
+                self._scan_nomatch = 0
+                self._scan_errors = 0
+                self._scan_rate_limits = 0
+                if duration_s is None:
+                    self.progress.Pulse()
+                else:
+                    self.progress.SetValue(0)
+                workers = payload.get("workers")
+                total_samples = payload.get("total_samples")
+                self._scan_total_samples = int(total_samples) if total_samples else None
+                if total_samples:
+                    duration_label = (
+                        format_hms(self._scan_duration_s) if self._scan_duration_s else "?"
+                    )
+                    self.progress_text.SetLabel(
+                        t(
+                            "progress.initial_known_total",
+                            file_prefix=file_prefix,
+                            total=total_samples,
+                            duration=duration_label,
+                            workers=workers,
                         )
+                    )
+                else:
+                    self.progress_text.SetLabel(
+                        t(
+                            "progress.initial_unknown_total",
+                            file_prefix=file_prefix,
+                            workers=workers,
+                        )
+                    )
+            elif kind == "status":
+                self.SetStatusText(payload)
+            elif kind == "progress":
+                done = payload.get("done")
+                total = payload.get("total")
+
+                file_prefix = ""
+                if self._scan_file_index and self._scan_file_total:
+                    file_prefix = f"[{self._scan_file_index}/{self._scan_file_total}] "
+
+                if (matches := payload.get("matches")) is not None:
+                    self._scan_matches = int(matches)
+                if (nomatch := payload.get("nomatch")) is not None:
+                    self._scan_nomatch = int(nomatch)
+                if (errors := payload.get("errors")) is not None:
+                    self._scan_errors = int(errors)
+                if (rate_limits := payload.get("rate_limits")) is not None:
+                    self._scan_rate_limits = int(rate_limits)
+
+                stats = t(
+                    "progress.stats",
+                    matches=self._scan_matches,
+                    nomatch=self._scan_nomatch,
+                    errors=self._scan_errors,
+                )
+                if self._scan_rate_limits:
+                    stats += t("progress.stats_rate_limits", rate_limits=self._scan_rate_limits)
+
+                if total:
+                    percent = int(min(100, (int(done) / max(1, int(total))) * 100))
+                    self.progress.SetValue(percent)
+                    eta_s = payload.get("eta_s")
+                    elapsed_s = payload.get("elapsed_s")
+                    offset_s = payload.get("offset_s")
+                    duration_label = (
+                        format_hms(self._scan_duration_s) if self._scan_duration_s else "?"
+                    )
+                    offset_label = format_hms(offset_s) if offset_s is not None else "?"
+                    if eta_s is not None and elapsed_s is not None:
+                        self._scan_elapsed_s = int(elapsed_s)
                         self.progress_text.SetLabel(
                             t(
-                                "progress.initial_known_total",
+                                "progress.update_with_eta",
                                 file_prefix=file_prefix,
-                                total=total_samples,
+                                percent=percent,
+                                done=done,
+                                total=total,
+                                elapsed=format_hms(elapsed_s),
+                                eta=format_hms(eta_s),
+                                offset=offset_label,
                                 duration=duration_label,
-                                workers=workers,
+                                stats=stats,
                             )
                         )
                     else:
                         self.progress_text.SetLabel(
                             t(
-                                "progress.initial_unknown_total",
+                                "progress.update_no_eta",
                                 file_prefix=file_prefix,
-                                workers=workers,
-                            )
-                        )
-                elif kind == "status":
-                    self.SetStatusText(payload)
-                elif kind == "progress":
-                    done = payload.get("done")
-                    total = payload.get("total")
-
-                    file_prefix = ""
-                    if self._scan_file_index and self._scan_file_total:
-                        file_prefix = f"[{self._scan_file_index}/{self._scan_file_total}] "
-
-                    if (matches := payload.get("matches")) is not None:
-                        self._scan_matches = int(matches)
-                    if (nomatch := payload.get("nomatch")) is not None:
-                        self._scan_nomatch = int(nomatch)
-                    if (errors := payload.get("errors")) is not None:
-                        self._scan_errors = int(errors)
-                    if (rate_limits := payload.get("rate_limits")) is not None:
-                        self._scan_rate_limits = int(rate_limits)
-
-                    stats = t(
-                        "progress.stats",
-                        matches=self._scan_matches,
-                        nomatch=self._scan_nomatch,
-                        errors=self._scan_errors,
-                    )
-                    if self._scan_rate_limits:
-                        stats += t("progress.stats_rate_limits", rate_limits=self._scan_rate_limits)
-
-                    if total:
-                        percent = int(min(100, (int(done) / max(1, int(total))) * 100))
-                        self.progress.SetValue(percent)
-                        eta_s = payload.get("eta_s")
-                        elapsed_s = payload.get("elapsed_s")
-                        offset_s = payload.get("offset_s")
-                        duration_label = (
-                            format_hms(self._scan_duration_s) if self._scan_duration_s else "?"
-                        )
-                        offset_label = format_hms(offset_s) if offset_s is not None else "?"
-                        if eta_s is not None and elapsed_s is not None:
-                            self._scan_elapsed_s = int(elapsed_s)
-                            self.progress_text.SetLabel(
-                                t(
-                                    "progress.update_with_eta",
-                                    file_prefix=file_prefix,
-                                    percent=percent,
-                                    done=done,
-                                    total=total,
-                                    elapsed=format_hms(elapsed_s),
-                                    eta=format_hms(eta_s),
-                                    offset=offset_label,
-                                    duration=duration_label,
-                                    stats=stats,
-                                )
-                            )
-                        else:
-                            self.progress_text.SetLabel(
-                                t(
-                                    "progress.update_no_eta",
-                                    file_prefix=file_prefix,
-                                    percent=percent,
-                                    done=done,
-                                    total=total,
-                                    offset=offset_label,
-                                    duration=duration_label,
-                                    stats=stats,
-                                )
-                            )
-                    else:
-                        self.progress.Pulse()
-                        if done:
-                            self.progress_text.SetLabel(
-                                t(
-                                    "progress.update_unknown_total_done",
-                                    file_prefix=file_prefix,
-                                    done=done,
-                                    stats=stats,
-                                )
-                            )
-                        else:
-                            self.progress_text.SetLabel(
-                                t("progress.update_unknown_total", file_prefix=file_prefix)
+                                percent=percent,
+                                done=done,
+                                total=total,
+                                offset=offset_label,
+                                duration=duration_label,
+                                stats=stats,
                             )
-                elif kind == "match":
-                    self.log.AppendText(payload + "\n")
-                elif kind == "info":
-                    self.log.AppendText(payload + "\n")
-                elif kind == "warn":
-                    self.log.AppendText(f"{t('log.warn_prefix')}{payload}\n")
-                elif kind in {"done", "stopped"}:
-                    file_prefix = ""
-                    if self._scan_file_index and self._scan_file_total:
-                        file_prefix = f"[{self._scan_file_index}/{self._scan_file_total}] "
-
-                    self.SetStatusText(payload)
-                    self._set_running(False)
-                    self.progress.SetValue(100 if kind == "done" else self.progress.GetValue())
-                    if kind == "done" and self._scan_total_samples is not None:
-                        duration_label = (
-                            format_hms(self._scan_duration_s) if self._scan_duration_s else "?"
                         )
-                        total_samples = self._scan_total_samples
+                else:
+                    self.progress.Pulse()
+                    if done:
                         self.progress_text.SetLabel(
                             t(
-                                "progress.done",
+                                "progress.update_unknown_total_done",
                                 file_prefix=file_prefix,
-                                total=total_samples,
-                                elapsed=format_hms(self._scan_elapsed_s),
-                                duration=duration_label,
-                                matches=self._scan_matches,
-                                nomatch=self._scan_nomatch,
-                                errors=self._scan_errors,
+                                done=done,
+                                stats=stats,
                             )
                         )
-                    elif kind == "stopped":
-                        self.progress_text.SetLabel(t("progress.stopped", file_prefix=file_prefix))
-                elif kind == "error":
-                    self.SetStatusText(t("status.error"))
-                    wx.MessageBox(payload, _APP_NAME, wx.OK | wx.ICON_ERROR, self)
-                    self._stop_event.set()
-                    self._set_running(False)
+                    else:
+                        self.progress_text.SetLabel(
+                            t("progress.update_unknown_total", file_prefix=file_prefix)
+                        )
+            elif kind in {"done", "stopped"}:
+                file_prefix = ""
+                if self._scan_file_index and self._scan_file_total:
+                    file_prefix = f"[{self._scan_file_index}/{self._scan_file_total}] "
+
+                self.SetStatusText(payload)
+                self._set_running(False)
+                self.progress.SetValue(100 if kind == "done" else self.progress.GetValue())
+                if kind == "done" and self._scan_total_samples is not None:
+                    duration_label = (
+                        format_hms(self._scan_duration_s) if self._scan_duration_s else "?"
+                    )
+                    total_samples = self._scan_total_samples
+                    self.progress_text.SetLabel(
+                        t(
+                            "progress.done",
+                            file_prefix=file_prefix,
+                            total=total_samples,
+                            elapsed=format_hms(self._scan_elapsed_s),
+                            duration=duration_label,
+                            matches=self._scan_matches,
+                            nomatch=self._scan_nomatch,
+                            errors=self._scan_errors,
+                        )
+                    )
+                elif kind == "stopped":
+                    self.progress_text.SetLabel(t("progress.stopped", file_prefix=file_prefix))
+            elif kind == "error":
+                self.SetStatusText(t("status.error"))
+                wx.MessageBox(payload, _APP_NAME, wx.OK | wx.ICON_ERROR, self)
+                self._stop_event.set()
+                self._wake_throttle()
+                self._set_running(False)
 
         def _on_close(self, event: wx.CloseEvent) -> None:
-            self._timer.Stop()
+            self._closing = True
+            if self._advanced_dialog is not None:
+                self._advanced_dialog.Destroy()
+                self._advanced_dialog = None
             self._stop_event.set()
+            self._wake_throttle()
             if self._worker and self._worker.is_alive():
                 self._worker.join(timeout=2.0)
-            self._persist_config()
+            _fingerprint_cache.close()
+            _duration_cache.cancel_pending()
+            _duration_cache.save()
+            self._persist_config(immediate=True)
             event.Skip()
 
     frame = MainFrame()
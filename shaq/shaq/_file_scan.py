@@ -1,19 +1,175 @@
 from __future__ import annotations
 
+import functools
+import math
+import mmap
 import os
 import shutil
+import struct
 import subprocess
 import sys
-import wave
-from io import BytesIO
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+WAV_HEADER_SIZE = _WAV_HEADER.size
+
+_RIFF_CHUNK_HEADER = struct.Struct("<4sI")
+_WAV_FMT = struct.Struct("<HHIIHH")
+# WAVE_FORMAT_PCM and WAVE_FORMAT_EXTENSIBLE, same as the `wave` module accepts.
+_WAV_PCM_FORMATS = frozenset({0x0001, 0xFFFE})
+
 
 class FfmpegNotFoundError(RuntimeError):
     pass
 
 
+def pack_wav_header_into(
+    buffer: bytearray | memoryview,
+    *,
+    data_size: int,
+    sample_rate: int,
+    channels: int,
+    sampwidth: int = 2,
+) -> None:
+    """
+    Writes a canonical 44-byte PCM WAV header describing `data_size` bytes
+    of audio into the start of `buffer`.
+    """
+    block_align = channels * sampwidth
+    _WAV_HEADER.pack_into(
+        buffer,
+        0,
+        b"RIFF",
+        36 + data_size,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,
+        channels,
+        sample_rate,
+        sample_rate * block_align,
+        block_align,
+        sampwidth * 8,
+        b"data",
+        data_size,
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class WavLayout:
+    channels: int
+    sampwidth: int
+    framerate: int
+    data_offset: int
+    data_size: int
+
+    @property
+    def frame_size(self) -> int:
+        return self.channels * self.sampwidth
+
+    @property
+    def nframes(self) -> int:
+        return self.data_size // self.frame_size
+
+
+def parse_wav_layout(wav_bytes: bytes | bytearray | memoryview | mmap.mmap) -> WavLayout | None:
+    """
+    Locates the PCM format and the `data` chunk of an in-memory WAV file
+    without copying any audio, or returns None if it isn't a PCM WAV.
+    """
+    total = len(wav_bytes)
+    if total < 12 or bytes(wav_bytes[:4]) != b"RIFF" or bytes(wav_bytes[8:12]) != b"WAVE":
+        return None
+
+    fmt: tuple[int, int, int] | None = None
+    pos = 12
+    while pos + _RIFF_CHUNK_HEADER.size <= total:
+        chunk_id, chunk_size = _RIFF_CHUNK_HEADER.unpack_from(wav_bytes, pos)
+        body = pos + _RIFF_CHUNK_HEADER.size
+        if chunk_id == b"fmt ":
+            if chunk_size < _WAV_FMT.size or body + _WAV_FMT.size > total:
+                return None
+            audio_format, channels, framerate, _, _, bits = _WAV_FMT.unpack_from(wav_bytes, body)
+            if audio_format not in _WAV_PCM_FORMATS or channels <= 0 or bits <= 0:
+                return None
+            fmt = (channels, (bits + 7) // 8, framerate)
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            channels, sampwidth, framerate = fmt
+            # Streamed WAVs (e.g. ffmpeg writing to a pipe) carry a bogus data size.
+            data_size = min(chunk_size, total - body)
+            return WavLayout(channels, sampwidth, framerate, body, data_size)
+        pos = body + chunk_size + (chunk_size & 1)
+
+    return None
+
+
+def _downmix_frames(
+    source: bytes | bytearray | mmap.mmap, layout: WavLayout, offset: int, nframes: int
+) -> bytearray:
+    """Mono WAV averaging the channels of `nframes` 16-bit frames at `offset` in `source`."""
+    import numpy as np
+
+    frames = np.frombuffer(
+        source, dtype="<i2", count=nframes * layout.channels, offset=offset
+    ).reshape(-1, layout.channels)
+
+    data_size = nframes * 2
+    mono = bytearray(WAV_HEADER_SIZE + data_size)
+    mixed = np.frombuffer(mono, dtype="<i2", offset=WAV_HEADER_SIZE)
+    np.floor_divide(
+        frames.sum(axis=1, dtype=np.int32), layout.channels, out=mixed, casting="unsafe"
+    )
+    pack_wav_header_into(mono, data_size=data_size, sample_rate=layout.framerate, channels=1)
+    return mono
+
+
+def window_energies(samples: Any, window_len: int, step: int) -> Any:
+    """
+    Sum of squares of `samples[o : o + window_len]` for every `o = 0, step, 2 * step, ...`
+    that fits. `samples` is a 1-D numpy array.
+
+    Overlapping windows share most of their samples, so the squares are summed once per
+    block of `gcd(window_len, step)` samples and each window just adds up its blocks.
+    """
+    import numpy as np
+
+    block = math.gcd(window_len, step)
+    nblocks = samples.size // block
+    x = samples[: nblocks * block].astype(np.float32).reshape(nblocks, block)
+    csum = np.zeros(nblocks + 1, dtype=np.float64)
+    np.cumsum(np.einsum("ij,ij->i", x, x), out=csum[1:])
+
+    blocks_per_window = window_len // block
+    starts = np.arange(0, nblocks - blocks_per_window + 1, step // block)
+    return csum[starts + blocks_per_window] - csum[starts]
+
+
+def loudest_windows(energies: Any, count: int) -> Any:
+    """
+    Indices of the `count` largest `energies`, loudest first, in the same order a stable
+    descending sort would give (earlier windows first on ties) but without sorting them all.
+    """
+    import numpy as np
+
+    n = energies.size
+    if count >= n:
+        return np.argsort(-energies, kind="stable")
+    if count == 1:
+        return np.atleast_1d(energies.argmax())
+    # Everything tied with the count-th largest is a candidate, so ties resolve as in a sort.
+    kth = np.partition(energies, n - count)[n - count]
+    candidates = np.flatnonzero(energies >= kth)
+    return candidates[np.argsort(-energies[candidates], kind="stable")][:count]
+
+
 def _candidate_input_formats(input_path: Path) -> list[str | None]:
     suffix = input_path.suffix.lower()
     if suffix == ".loas":
@@ -51,6 +207,51 @@ def _windows_subprocess_kwargs() -> dict[str, Any]:
     return {"creationflags": getattr(subprocess, "CREATE_NO_WINDOW", 0)}
 
 
+# How often a running ffmpeg checks whether it should be stopped.
+_STOP_POLL_INTERVAL_S = 0.2
+
+
+def _run_ffmpeg(
+    cmd: list[str], *, timeout: float, stop_event: threading.Event | None
+) -> subprocess.CompletedProcess[bytes] | None:
+    """
+    Like `subprocess.run(cmd, capture_output=True, timeout=timeout)`, but kills
+    the process and returns None as soon as `stop_event` is set.
+    """
+    if stop_event is None:
+        return subprocess.run(
+            cmd,
+            check=False,
+            capture_output=True,
+            timeout=timeout,
+            **_windows_subprocess_kwargs(),
+        )
+
+    deadline = time.monotonic() + timeout
+    with subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        **_windows_subprocess_kwargs(),
+    ) as proc:
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                # Output read so far is kept across timeouts, so this can be retried.
+                stdout, stderr = proc.communicate(
+                    timeout=max(0.0, min(remaining, _STOP_POLL_INTERVAL_S))
+                )
+            except subprocess.TimeoutExpired:
+                if stop_event.is_set() or remaining <= 0:
+                    proc.kill()
+                    proc.communicate()
+                    if stop_event.is_set():
+                        return None
+                    raise subprocess.TimeoutExpired(cmd, timeout) from None
+                continue
+            return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+
 def _ffmpeg_timeout_seconds(*, duration_s: int) -> float:
     # Allow overhead for probing/seeking, but avoid hanging forever.
     base = max(60.0, (float(duration_s) * 10.0) + 60.0)
@@ -89,6 +290,11 @@ def require_ffmpeg() -> tuple[str, str | None]:
 
 
 def probe_duration_seconds(input_path: Path) -> float | None:
+    # PCM WAVs carry their length in the header; no need to start ffprobe for them.
+    with open_pcm_wav(input_path) as mapped:
+        if mapped is not None and (layout := parse_wav_layout(mapped)) is not None:
+            return layout.nframes / layout.framerate if layout.nframes > 0 else None
+
     _, ffprobe = require_ffmpeg()
     if not ffprobe:
         return None
@@ -141,7 +347,13 @@ def extract_wav_segment(
     duration_s: int,
     sample_rate: int = 16000,
     channels: int = 1,
-) -> bytes | None:
+    stop_event: threading.Event | None = None,
+) -> bytearray | None:
+    """
+    Decodes `[start_s, start_s + duration_s)` of any input ffmpeg can read to a
+    16-bit PCM WAV. Returns None past the end of the audio, or when `stop_event`
+    is set while ffmpeg runs (the process is killed rather than waited for).
+    """
     ffmpeg, _ = require_ffmpeg()
 
     last_error: str | None = None
@@ -206,16 +418,16 @@ def extract_wav_segment(
                 )
 
                 try:
-                    proc = subprocess.run(
+                    proc = _run_ffmpeg(
                         cmd,
-                        check=False,
-                        capture_output=True,
                         timeout=_ffmpeg_timeout_seconds(duration_s=duration_s),
-                        **_windows_subprocess_kwargs(),
+                        stop_event=stop_event,
                     )
                 except subprocess.TimeoutExpired:
                     last_error = "ffmpeg timeout"
                     continue
+                if proc is None:
+                    return None
 
                 if proc.returncode != 0:
                     stderr = proc.stderr.decode("utf-8", errors="replace").strip()
@@ -223,80 +435,101 @@ def extract_wav_segment(
                     continue
 
                 pcm_bytes = proc.stdout
-                if not isinstance(pcm_bytes, (bytes, bytearray)):
+                if not isinstance(pcm_bytes, bytes):
                     raise RuntimeError("ffmpeg returned unexpected output")
-                pcm_bytes = bytes(pcm_bytes)
-                if not pcm_bytes:
-                    return None
 
+                # Raw PCM rather than ffmpeg's WAV: piped WAV output carries placeholder
+                # RIFF/data sizes. Drop any partial trailing frame.
                 frame_size = channels * 2
-                if frame_size <= 0:
-                    raise RuntimeError("invalid audio frame size")
-                pcm_bytes = pcm_bytes[: len(pcm_bytes) - (len(pcm_bytes) % frame_size)]
-                if not pcm_bytes:
+                data_size = len(pcm_bytes) - len(pcm_bytes) % frame_size
+                if data_size <= 0:
                     return None
-
-                with BytesIO() as out_io:
-                    with wave.open(out_io, "wb") as wav_out:
-                        wav_out.setnchannels(channels)
-                        wav_out.setsampwidth(2)
-                        wav_out.setframerate(sample_rate)
-                        wav_out.writeframes(pcm_bytes)
-                    wav_bytes = out_io.getvalue()
-                try:
-                    with wave.open(BytesIO(wav_bytes), "rb") as wav:
-                        if wav.getnframes() <= 0:
-                            return None
-                except wave.Error:
-                    return None
-
-                return wav_bytes
+                wav = bytearray(WAV_HEADER_SIZE + data_size)
+                pack_wav_header_into(
+                    wav, data_size=data_size, sample_rate=sample_rate, channels=channels
+                )
+                wav[WAV_HEADER_SIZE:] = memoryview(pcm_bytes)[:data_size]
+                return wav
 
     detail = f" (próbowałem: {', '.join(attempts)})" if len(attempts) > 1 else ""
     raise RuntimeError(f"{last_error or 'ffmpeg failed'}{detail}")
 
 
+@contextmanager
+def open_pcm_wav(input_path: Path) -> Iterator[mmap.mmap | None]:
+    """
+    Maps a 16-bit PCM WAV file into memory, so samples can be cut straight out
+    of it with `slice_wav_bytes` instead of running ffmpeg for each one; pages
+    are read (and read ahead) by the OS as the scan reaches them. Yields None
+    for any other input, which then goes through `extract_wav_segment`.
+    """
+    if input_path.suffix.lower() != ".wav":
+        yield None
+        return
+    try:
+        with input_path.open("rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        yield None
+        return
+
+    with mapped:
+        layout = parse_wav_layout(mapped)
+        if layout is None or layout.sampwidth != 2 or layout.framerate <= 0:
+            yield None
+        else:
+            yield mapped
+
+
 def slice_wav_bytes(
-    wav_bytes: bytes,
+    wav_bytes: bytes | bytearray | mmap.mmap,
     *,
     start_s: int,
     duration_s: int,
-) -> bytes | None:
+    layout: WavLayout | None = None,
+    mono: bool = False,
+) -> bytes | bytearray | None:
+    """
+    Cuts `[start_s, start_s + duration_s)` out of a PCM WAV as a standalone WAV.
+    Pass `layout` when the header has already been parsed; with `mono`, 16-bit
+    multichannel audio is mixed down while it is copied.
+    """
     if start_s < 0:
         start_s = 0
     if duration_s <= 0:
         return None
 
-    try:
-        with wave.open(BytesIO(wav_bytes), "rb") as wav_in:
-            framerate = wav_in.getframerate()
-            if framerate <= 0:
-                return None
-
-            start_frame = int(start_s * framerate)
-            duration_frames = int(duration_s * framerate)
-            if duration_frames <= 0:
-                return None
-
-            if start_frame >= wav_in.getnframes():
-                return None
-
-            wav_in.setpos(start_frame)
-            frames = wav_in.readframes(duration_frames)
-            if not frames:
-                return None
-
-            with BytesIO() as out_io:
-                with wave.open(out_io, "wb") as wav_out:
-                    wav_out.setnchannels(wav_in.getnchannels())
-                    wav_out.setsampwidth(wav_in.getsampwidth())
-                    wav_out.setframerate(framerate)
-                    wav_out.writeframes(frames)
-                return out_io.getvalue()
-    except wave.Error:
+    if layout is None:
+        layout = parse_wav_layout(wav_bytes)
+    if layout is None or layout.framerate <= 0:
         return None
 
-
+    start_frame = int(start_s * layout.framerate)
+    duration_frames = int(duration_s * layout.framerate)
+    if duration_frames <= 0 or start_frame >= layout.nframes:
+        return None
+    end_frame = min(layout.nframes, start_frame + duration_frames)
+    start = layout.data_offset + start_frame * layout.frame_size
+    if mono and layout.channels > 1 and layout.sampwidth == 2:
+        return _downmix_frames(wav_bytes, layout, start, end_frame - start_frame)
+
+    data_size = (end_frame - start_frame) * layout.frame_size
+    header = bytearray(WAV_HEADER_SIZE)
+    pack_wav_header_into(
+        header,
+        data_size=data_size,
+        sample_rate=layout.framerate,
+        channels=layout.channels,
+        sampwidth=layout.sampwidth,
+    )
+
+    # Copy the frames exactly once, straight out of the source buffer.
+    with memoryview(wav_bytes) as view:
+        return bytes(header) + view[start : start + data_size]
+
+
+# Pure, and called with the same few offsets over and over (log lines, retries).
+@functools.lru_cache(maxsize=4096)
 def format_hms(total_seconds: int) -> str:
     total_seconds = max(0, int(total_seconds))
     hours, remainder = divmod(total_seconds, 3600)
@@ -5,17 +5,19 @@ import math
 import os
 import threading
 import traceback
-import wave
 import json
 from dataclasses import dataclass
-from io import BytesIO
 from pathlib import Path
-from queue import Empty, Queue
 from tempfile import NamedTemporaryFile
 from typing import Any
 
 from shaq._i18n import I18n, UI_LANGUAGE_CHOICES, ui_language_from_config
-from shaq._file_scan import slice_wav_bytes
+from shaq._file_scan import (
+    loudest_windows,
+    parse_wav_layout,
+    slice_wav_bytes,
+    window_energies,
+)
 
 _SYGNALISTA_GUI_IMPORT_ERROR: str | None = None
 try:
@@ -25,13 +27,12 @@ except Exception as exc:  # pragma: no cover - optional at runtime (and for PyIn
     _sygnalista_gui = None  # type: ignore[assignment]
 
 from shaq._shazam_regions import (
-    SUPPORTED_ENDPOINT_COUNTRIES,
-    SUPPORTED_LANGUAGES,
     country_choice_strings,
     country_codes,
-    find_index_by_code,
+    country_index,
     language_choice_strings,
     language_codes,
+    language_index,
 )
 
 _APP_NAME = "shaqgui"
@@ -440,28 +441,19 @@ def _rank_window_starts_by_rms(
     window_step_s: int,
     max_windows: int,
 ) -> tuple[list[int], float]:
-    try:
-        with wave.open(BytesIO(wav_bytes), "rb") as wav_in:
-            channels = wav_in.getnchannels()
-            sampwidth = wav_in.getsampwidth()
-            framerate = wav_in.getframerate()
-            declared_nframes = wav_in.getnframes()
-            frames = wav_in.readframes(declared_nframes)
-    except wave.Error:
-        return [0], float("-inf")
-
-    if framerate <= 0 or sampwidth != 2:
+    layout = parse_wav_layout(wav_bytes)
+    if layout is None or layout.framerate <= 0 or layout.sampwidth != 2:
         return [0], float("-inf")
 
-    frame_size = channels * sampwidth
-    if frame_size <= 0:
-        return [0], float("-inf")
-
-    actual_nframes = len(frames) // frame_size
+    channels = layout.channels
+    framerate = layout.framerate
+    actual_nframes = layout.nframes
     if actual_nframes <= 0:
         return [0], float("-inf")
 
-    frames = frames[: actual_nframes * frame_size]
+    # A view into the recording; the PCM is not copied out of it.
+    data_start = layout.data_offset
+    frames = memoryview(wav_bytes)[data_start : data_start + actual_nframes * layout.frame_size]
 
     import numpy as np
 
@@ -476,22 +468,18 @@ def _rank_window_starts_by_rms(
         return [0], dbfs
 
     step_frames = max(1, int(window_step_s * framerate))
-    last_start = pcm.shape[0] - window_frames
-    candidates: list[tuple[float, int]] = []
-    for start_frame in range(0, last_start + 1, step_frames):
-        window = pcm[start_frame : start_frame + window_frames]
-        if window.size <= 0:
-            continue
-        rms = float(np.sqrt(np.mean(window.astype(np.float32) ** 2)))
-        candidates.append((rms, start_frame))
-
-    candidates.sort(key=lambda item: (-item[0], item[1]))
-    best_rms = candidates[0][0] if candidates else 0.0
+    # All windows in one pass over the samples instead of a Python loop per window.
+    energies = window_energies(pcm, window_frames, step_frames)
+    # Up to this many windows start within the same second, so this many times
+    # `max_windows` candidates always hold `max_windows` distinct starts.
+    per_second = -(-framerate // step_frames)
+    order = loudest_windows(energies, max_windows * per_second)
+    best_rms = math.sqrt(max(float(energies[order[0]]), 0.0) / window_frames)
     best_dbfs = float("-inf") if best_rms <= 0 else 20.0 * math.log10(best_rms / 32767.0)
 
     starts: list[int] = []
     seen: set[int] = set()
-    for _rms, start_frame in candidates:
+    for start_frame in (order * step_frames).tolist():
         start_s = int(start_frame / framerate)
         if start_s in seen:
             continue
@@ -603,7 +591,7 @@ def _main() -> None:
                 self._speakers = []
                 self._microphones = []
 
-            self._events: Queue[tuple[str, str]] = Queue()
+            self._closing = False
             self._stop_event = threading.Event()
             self._worker: threading.Thread | None = None
 
@@ -689,7 +677,7 @@ def _main() -> None:
             self.language_choice.SetName(t("name.shazam_language"))
             self.language_choice.SetHelpText(t("help.shazam_language"))
             cfg_language = str(config.get("language") or "").strip() or _DEFAULT_SHAZAM_LANGUAGE
-            language_idx = find_index_by_code(SUPPORTED_LANGUAGES, cfg_language)
+            language_idx = language_index(cfg_language)
             self.language_choice.SetSelection(language_idx if language_idx is not None else 0)
 
             country_label = wx.StaticText(panel, label=t("label.shazam_country"))
@@ -698,7 +686,7 @@ def _main() -> None:
             self.country_choice.SetName(t("name.shazam_country"))
             self.country_choice.SetHelpText(t("help.shazam_country"))
             cfg_country = str(config.get("endpoint_country") or "").strip() or _DEFAULT_SHAZAM_COUNTRY
-            country_idx = find_index_by_code(SUPPORTED_ENDPOINT_COUNTRIES, cfg_country)
+            country_idx = country_index(cfg_country)
             self.country_choice.SetSelection(country_idx if country_idx is not None else 0)
 
             out_label = wx.StaticText(panel, label=t("label.output_file"))
@@ -769,10 +757,6 @@ def _main() -> None:
             layout.Add(buttons, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 12)
             panel.SetSizer(layout)
 
-            self._timer = wx.Timer(self)
-            self.Bind(wx.EVT_TIMER, self._on_timer, self._timer)
-            self._timer.Start(150)
-
             self.Bind(wx.EVT_CLOSE, self._on_close)
 
         def _set_running(self, running: bool) -> None:
@@ -960,15 +944,15 @@ def _main() -> None:
             def _after_modal() -> None:
                 try:
                     self.Raise()
-                    self.Refresh()
+                    self.Refresh(eraseBackground=False)
                     self.Update()
-                    self.SendSizeEvent()
-                except Exception:
-                    pass
-                try:
-                    _win32_force_redraw(int(self.GetHandle()))
                 except Exception:
                     pass
+                if wx.Platform == "__WXMSW__":
+                    try:
+                        _win32_force_redraw(int(self.GetHandle()))
+                    except Exception:
+                        pass
                 try:
                     wx.YieldIfNeeded()
                 except Exception:
@@ -1082,7 +1066,6 @@ def _main() -> None:
             dialog.ShowModal()
             dialog.Destroy()
             wx.CallAfter(_after_modal)
-            wx.CallLater(50, _after_modal)
 
         def _on_browse(self, _event: wx.CommandEvent) -> None:
             with wx.FileDialog(
@@ -1175,7 +1158,7 @@ def _main() -> None:
 
             try:
                 while not self._stop_event.is_set():
-                    self._events.put(("status", t("status.listening")))
+                    self._post_event(("status", t("status.listening")))
                     audio = _record_wav(
                         sc,
                         device.id,
@@ -1213,7 +1196,7 @@ def _main() -> None:
                             continue
 
                         if len(window_starts) > 1:
-                            self._events.put(
+                            self._post_event(
                                 (
                                     "status",
                                     t(
@@ -1224,7 +1207,7 @@ def _main() -> None:
                                 )
                             )
                         else:
-                            self._events.put(("status", t("status.recognizing")))
+                            self._post_event(("status", t("status.recognizing")))
 
                         try:
                             raw = loop.run_until_complete(shazam.recognize(window_audio))  # type: ignore[arg-type]
@@ -1257,7 +1240,7 @@ def _main() -> None:
                             backoff_s = max(backoff_s, 30.0)
 
                         detail = f": {text}" if text else ""
-                        self._events.put(
+                        self._post_event(
                             (
                                 "status",
                                 t(
@@ -1283,36 +1266,42 @@ def _main() -> None:
                     line = f"{track.track.subtitle} - {track.track.title}"
                     try:
                         if writer.append_unique(line):
-                            self._events.put(("track", line))
-                            self._events.put(("status", t("status.saved")))
+                            self._post_event(("track", line))
+                            self._post_event(("status", t("status.saved")))
                     except OSError as exc:
-                        self._events.put(("error", t("error.write_file", error=str(exc))))
+                        self._post_event(("error", t("error.write_file", error=str(exc))))
             except Exception as exc:
-                self._events.put(("error", str(exc)))
+                self._post_event(("error", str(exc)))
             finally:
-                self._events.put(("stopped", t("status.stopped")))
+                self._post_event(("stopped", t("status.stopped")))
+
+        def _post_event(self, event: tuple[str, str]) -> None:
+            """
+            Called from the worker thread; hands the event to the UI thread with
+            `wx.CallAfter` instead of having a timer poll a queue.
+            """
+            if self._closing:
+                return
+            kind, payload = event
+            wx.CallAfter(self._on_worker_event, kind, payload)
 
-        def _on_timer(self, _event: wx.TimerEvent) -> None:
-            while True:
-                try:
-                    kind, payload = self._events.get_nowait()
-                except Empty:
-                    break
-
-                if kind == "status":
-                    self.SetStatusText(payload)
-                elif kind == "track":
-                    self.log_list.Append(payload)
-                elif kind == "error":
-                    self.SetStatusText(t("status.error"))
-                    wx.MessageBox(payload, _APP_NAME, wx.OK | wx.ICON_ERROR, self)
-                    self._stop_event.set()
-                elif kind == "stopped":
-                    self.SetStatusText(payload)
-                    self._set_running(False)
+        def _on_worker_event(self, kind: str, payload: str) -> None:
+            if self._closing:
+                return
+            if kind == "status":
+                self.SetStatusText(payload)
+            elif kind == "track":
+                self.log_list.Append(payload)
+            elif kind == "error":
+                self.SetStatusText(t("status.error"))
+                wx.MessageBox(payload, _APP_NAME, wx.OK | wx.ICON_ERROR, self)
+                self._stop_event.set()
+            elif kind == "stopped":
+                self.SetStatusText(payload)
+                self._set_running(False)
 
         def _on_close(self, event: wx.CloseEvent) -> None:
-            self._timer.Stop()
+            self._closing = True
             self._stop_event.set()
             if self._worker and self._worker.is_alive():
                 self._worker.join(timeout=2.0)
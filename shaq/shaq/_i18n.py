@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import locale
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 
 SUPPORTED_UI_LANGUAGES: tuple[str, ...] = ("pl", "en")
@@ -56,17 +56,22 @@ def ui_language_from_config(value: Any) -> str:
 class I18n:
     lang: str
     strings: dict[str, dict[str, str]]
+    # `strings` resolved for `lang` (with the English fallback) once, up front,
+    # so `t()` is a single lookup.
+    _table: dict[str, str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        table = {
+            key: by_lang.get(self.lang) or by_lang.get("en") or key
+            for key, by_lang in self.strings.items()
+        }
+        object.__setattr__(self, "_table", table)
 
     def t(self, key: str, **kwargs: Any) -> str:
-        template = (
-            self.strings.get(key, {}).get(self.lang)
-            or self.strings.get(key, {}).get("en")
-            or key
-        )
+        template = self._table.get(key) or key
         if not kwargs:
             return template
         try:
-            return template.format(**kwargs)
+            return template.format_map(kwargs)
         except Exception:
             return template
-
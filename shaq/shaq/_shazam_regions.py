@@ -124,6 +124,25 @@ def country_codes() -> list[str]:
     return [code for code, _ in SUPPORTED_ENDPOINT_COUNTRIES]
 
 
+def _build_index(options: Sequence[tuple[str, str]]) -> dict[str, int]:
+    index: dict[str, int] = {}
+    for idx, (value, _label) in enumerate(options):
+        index.setdefault(_norm(value), idx)
+    return index
+
+
+_LANGUAGE_INDEX = _build_index(SUPPORTED_LANGUAGES)
+_COUNTRY_INDEX = _build_index(SUPPORTED_ENDPOINT_COUNTRIES)
+
+
+def language_index(code: str) -> int | None:
+    return _LANGUAGE_INDEX.get(_norm(code))
+
+
+def country_index(code: str) -> int | None:
+    return _COUNTRY_INDEX.get(_norm(code))
+
+
 def find_index_by_code(options: Sequence[tuple[str, str]], code: str) -> int | None:
     target = _norm(code)
     for idx, (value, _label) in enumerate(options):
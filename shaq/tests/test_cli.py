@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import wave
+from io import BytesIO
+
+import shaq._cli as cli
+
+
+def test_parser_defaults() -> None:
+    args = cli._parser().parse_args([])
+    assert args.duration == 10
+    assert args.sample_rate == 16000
+    assert args.early_match is False
+
+
+def test_append_history_creates_parent_and_appends(tmp_path) -> None:
+    history_path = tmp_path / "nested" / "history.txt"
+
+    cli._append_history(history_path, "a")
+    cli._append_history(history_path, "b")
+
+    assert history_path.read_text(encoding="utf-8").splitlines() == ["a", "b"]
+
+
+def test_snapshot_marks_stop_before_duration() -> None:
+    args = cli._parser().parse_args(["--duration", "6", "--sample-rate", "100"])
+    assert cli._snapshot_marks(args) == [500, 300]
+
+
+def test_wav_snapshot_is_valid_wav() -> None:
+    args = cli._parser().parse_args(["--sample-rate", "8000"])
+    buf = bytearray(cli.WAV_HEADER_SIZE + 8000 * 2)
+
+    snapshot = cli._wav_snapshot(buf, 4000 * 2, args)
+    with wave.open(BytesIO(bytes(snapshot)), "rb") as wav:
+        assert wav.getframerate() == 8000
+        assert wav.getnframes() == 4000
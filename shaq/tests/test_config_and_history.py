@@ -1,6 +1,11 @@
 from __future__ import annotations
 
+import functools
 import os
+import threading
+import time
+
+import pytest
 
 import shaq._file_gui as file_gui
 import shaq._gui as live_gui
@@ -13,6 +18,10 @@ def _set_test_config_dir(monkeypatch, tmp_path) -> None:
     else:
         monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path))
         monkeypatch.delenv("APPDATA", raising=False)
+    # The file GUI resolves its config path once per process; give the test a fresh cache.
+    monkeypatch.setattr(
+        file_gui, "_config_path", functools.cache(file_gui._config_path.__wrapped__)
+    )
 
 
 def test_save_and_load_config_roundtrip(monkeypatch, tmp_path) -> None:
@@ -22,6 +31,18 @@ def test_save_and_load_config_roundtrip(monkeypatch, tmp_path) -> None:
     assert file_gui._load_config() == {"hello": "world"}
 
 
+def test_save_config_failure_leaves_no_temp_file(monkeypatch, tmp_path) -> None:
+    _set_test_config_dir(monkeypatch, tmp_path)
+
+    def _fail_replace(*_args: object) -> None:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(file_gui.os, "replace", _fail_replace)
+    with pytest.raises(OSError):
+        file_gui._save_config({"hello": "world"})
+    assert list(file_gui._config_path().parent.iterdir()) == []
+
+
 def test_load_config_invalid_json_returns_empty(monkeypatch, tmp_path) -> None:
     _set_test_config_dir(monkeypatch, tmp_path)
 
@@ -31,6 +52,19 @@ def test_load_config_invalid_json_returns_empty(monkeypatch, tmp_path) -> None:
     assert file_gui._load_config() == {}
 
 
+def test_config_writer_saves_latest_snapshot(monkeypatch, tmp_path) -> None:
+    _set_test_config_dir(monkeypatch, tmp_path)
+    errors: list[Exception] = []
+    writer = file_gui._ConfigWriter(on_error=errors.append)
+
+    for n in range(5):
+        writer.submit({"n": n})
+    writer.wait_idle()
+
+    assert file_gui._load_config() == {"n": 4}
+    assert errors == []
+
+
 def test_history_writer_dedupes(monkeypatch, tmp_path) -> None:
     history_path = tmp_path / "history.txt"
     history_path.write_text("a\n", encoding="utf-8")
@@ -41,3 +75,265 @@ def test_history_writer_dedupes(monkeypatch, tmp_path) -> None:
 
     lines = history_path.read_text(encoding="utf-8").splitlines()
     assert lines == ["a", "b"]
+
+
+def test_loop_thread_runs_coroutines_from_worker_threads() -> None:
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    async def _double(value: int) -> int:
+        await asyncio.sleep(0)
+        return value * 2
+
+    with file_gui._LoopThread() as runner:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda value: runner.run(_double(value)), range(8)))
+
+    assert results == [value * 2 for value in range(8)]
+
+
+def test_loop_thread_awaits_on_close() -> None:
+    closed: list[bool] = []
+
+    async def _close() -> None:
+        closed.append(True)
+
+    with file_gui._LoopThread(on_close=_close):
+        pass
+
+    assert closed == [True]
+
+
+def test_uuid_pool_yields_unique_uppercase_v4_uuids() -> None:
+    import uuid
+
+    pool = file_gui._UuidPool()
+    values = [pool.next() for _ in range(600)]
+
+    assert len(set(values)) == len(values)
+    for value in values:
+        assert value == value.upper()
+        assert uuid.UUID(value).version == 4
+
+
+def test_duration_cache_probes_unchanged_file_once(monkeypatch, tmp_path) -> None:
+    calls: list[object] = []
+
+    def fake_probe(path):
+        calls.append(path)
+        return 12.5
+
+    monkeypatch.setattr(file_gui, "probe_duration_seconds", fake_probe)
+    media = tmp_path / "a.mp3"
+    media.write_bytes(b"x")
+
+    store = tmp_path / "durations.json"
+    cache = file_gui._DurationCache(lambda: store)
+    assert cache.probe(media) == 12.5
+    assert cache.probe(media) == 12.5
+    assert len(calls) == 1
+    cache.save()
+
+    restored = file_gui._DurationCache(lambda: store)
+    restored.load()
+    assert restored.probe(media) == 12.5
+    assert len(calls) == 1
+
+    media.write_bytes(b"xy")
+    assert restored.cached(media) is None
+    assert restored.probe(media) == 12.5
+    assert len(calls) == 2
+    assert restored.cached(media) == 12.5
+
+
+def test_duration_cache_prefetch_fills_cache_in_background(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(file_gui, "probe_duration_seconds", lambda path: 3.0)
+    paths = []
+    for name in ("a.mp3", "b.mp3"):
+        path = tmp_path / name
+        path.write_bytes(b"x")
+        paths.append(path)
+
+    cache = file_gui._DurationCache(lambda: tmp_path / "durations.json")
+    cache.prefetch(paths)
+
+    deadline = time.monotonic() + 5.0
+    while len(cache.dump()) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sorted(entry[0] for entry in cache.dump()) == [str(p) for p in paths]
+
+
+def test_duration_cache_probe_waits_for_running_prefetch(monkeypatch, tmp_path) -> None:
+    started = threading.Event()
+    release = threading.Event()
+    calls: list[object] = []
+
+    def slow_probe(path):
+        calls.append(path)
+        started.set()
+        release.wait(5.0)
+        return 7.0
+
+    monkeypatch.setattr(file_gui, "probe_duration_seconds", slow_probe)
+    media = tmp_path / "a.mp3"
+    media.write_bytes(b"x")
+
+    cache = file_gui._DurationCache(lambda: tmp_path / "durations.json")
+    cache.prefetch([media])
+    assert started.wait(5.0)
+    cache.prefetch([media])  # already running: not queued again
+
+    result: list[float | None] = []
+    waiter = threading.Thread(target=lambda: result.append(cache.probe(media)))
+    waiter.start()
+    release.set()
+    waiter.join(5.0)
+    assert result == [7.0]
+    assert len(calls) == 1
+
+
+def test_duration_cache_cancel_pending_drops_queued_probes(monkeypatch, tmp_path) -> None:
+    release = threading.Event()
+    calls: list[object] = []
+
+    def blocking_probe(path):
+        calls.append(path)
+        release.wait(5.0)
+        return 1.0
+
+    monkeypatch.setattr(file_gui, "probe_duration_seconds", blocking_probe)
+    monkeypatch.setattr(file_gui._DurationCache, "_MAX_PREFETCH_PROBES", 1)
+    paths = []
+    for name in ("a.mp3", "b.mp3", "c.mp3"):
+        path = tmp_path / name
+        path.write_bytes(b"x")
+        paths.append(path)
+
+    cache = file_gui._DurationCache(lambda: tmp_path / "durations.json")
+    cache.prefetch(paths)
+    deadline = time.monotonic() + 5.0
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    cache.cancel_pending()
+    release.set()
+
+    deadline = time.monotonic() + 5.0
+    while not cache.dump() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    assert calls == [paths[0]]
+
+
+def test_adaptive_throttle_waits_for_stop_without_polling() -> None:
+    throttle = file_gui._AdaptiveThrottle(0.0)
+    assert throttle.note_rate_limit(30) >= 29
+
+    waits: list[float | None] = []
+    condition = throttle._cv
+
+    class _CountingCondition:
+        def __enter__(self):
+            return condition.__enter__()
+
+        def __exit__(self, *exc_info):
+            return condition.__exit__(*exc_info)
+
+        def wait(self, timeout=None):
+            waits.append(timeout)
+            return condition.wait(timeout)
+
+        def notify_all(self) -> None:
+            condition.notify_all()
+
+    throttle._cv = _CountingCondition()
+    stop_event = threading.Event()
+    result: list[bool] = []
+    waiter = threading.Thread(target=lambda: result.append(throttle.wait_for_slot(stop_event)))
+    waiter.start()
+
+    deadline = time.monotonic() + 5.0
+    while not waits and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.6)
+    assert len(waits) == 1  # one wait for the whole freeze, no periodic wakeups
+    assert waits[0] is not None and waits[0] > 25
+
+    stop_event.set()
+    stopped_at = time.monotonic()
+    throttle.wake_all()
+    waiter.join(5.0)
+    assert result == [False]
+    assert time.monotonic() - stopped_at < 1.0
+    assert len(waits) == 1
+
+
+def test_folder_scan_filters_and_recurses(tmp_path) -> None:
+    (tmp_path / "b.MP3").write_bytes(b"")
+    (tmp_path / "a.wav").write_bytes(b"")
+    (tmp_path / "notes.txt").write_bytes(b"")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "c.flac").write_bytes(b"")
+
+    scan = file_gui._FolderScan(tmp_path, recursive=False)
+    assert list(scan) == [tmp_path / "a.wav", tmp_path / "b.MP3"]
+    assert scan.skipped == 1
+
+    found = list(file_gui._FolderScan(tmp_path, recursive=True))
+    assert found == [tmp_path / "a.wav", tmp_path / "b.MP3", tmp_path / "sub" / "c.flac"]
+
+
+def test_clamp_helpers() -> None:
+    assert file_gui._clamp_int(50, minimum=1, maximum=32) == 32
+    assert file_gui._clamp_int("7", minimum=1, maximum=32) == 7
+    assert file_gui._clamp_int("x", minimum=1, maximum=32) == 1
+    assert file_gui._clamp_float(-120.0, minimum=-100.0, maximum=0.0) == -100.0
+    assert file_gui._clamp_float("-40,5", minimum=-100.0, maximum=0.0) == -100.0
+
+
+def test_is_regular_file(tmp_path) -> None:
+    (tmp_path / "a.wav").write_bytes(b"")
+    assert file_gui._is_regular_file(str(tmp_path / "a.wav"))
+    assert not file_gui._is_regular_file(str(tmp_path))
+    assert not file_gui._is_regular_file(str(tmp_path / "missing.wav"))
+    assert not file_gui._is_regular_file("bad\0name")
+
+
+def test_fingerprint_cache_roundtrip(tmp_path) -> None:
+    cache = file_gui._FingerprintCache(lambda: tmp_path / "sub" / "fp.sqlite3")
+    key = b"\x01" * 32
+
+    hit = {"matches": [{"id": "1"}], "track": {"title": "x"}}
+
+    assert cache.get(key, "en-US", "US") is None
+    cache.put(key, "en-US", "US", {"matches": [], "tagid": "t"})
+    cache.put(key, "en-US", "US", {"error": {"message": "boom"}})
+    assert cache.get(key, "en-US", "US") is None
+
+    cache.put(key, "en-US", "US", hit)
+    assert cache.get(key, "en-US", "US") == hit
+    assert cache.get(key, "pl-PL", "PL") is None
+
+    cache.close()
+    cache.put(key, "en-US", "US", hit)  # e.g. a scan thread finishing after close
+    assert cache.get(key, "en-US", "US") is None
+    assert cache._conn is None
+
+    reopened = file_gui._FingerprintCache(lambda: tmp_path / "sub" / "fp.sqlite3")
+    assert reopened.get(key, "en-US", "US") == hit
+    reopened.close()
+
+
+def test_mean_square_dbfs() -> None:
+    assert file_gui._mean_square_dbfs(0.0, sampwidth=2) == float("-inf")
+    assert abs(file_gui._mean_square_dbfs(32767.0**2, sampwidth=2)) < 1e-9
+    assert abs(file_gui._mean_square_dbfs(127.0**2 / 100, sampwidth=1) + 20.0) < 1e-9
+
+
+def test_parse_retry_after_seconds() -> None:
+    now = 784111777.0  # Sun, 06 Nov 1994 08:49:37 GMT
+    assert file_gui._parse_retry_after_seconds(" 120 ") == 120
+    assert file_gui._parse_retry_after_seconds("0") is None
+    assert file_gui._parse_retry_after_seconds("Sun, 06 Nov 1994 08:50:07 GMT", now=now) == 30
+    assert file_gui._parse_retry_after_seconds("Sun, 06 Nov 1994 08:49:00 GMT", now=now) is None
+    assert file_gui._parse_retry_after_seconds("soon") is None
+    assert file_gui._parse_retry_after_seconds(None) is None
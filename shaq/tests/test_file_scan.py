@@ -1,16 +1,29 @@
 from __future__ import annotations
 
+import sys
+import threading
+import time
 import wave
 from io import BytesIO
 from pathlib import Path
 
+import pytest
+
 from shaq._file_scan import (
+    WAV_HEADER_SIZE,
     _candidate_input_formats,
     _ffmpeg_timeout_seconds,
+    _run_ffmpeg,
     _should_try_big_probe,
     _should_try_post_seek,
     format_hms,
+    loudest_windows,
+    open_pcm_wav,
+    pack_wav_header_into,
+    parse_wav_layout,
+    probe_duration_seconds,
     slice_wav_bytes,
+    window_energies,
 )
 
 
@@ -56,6 +69,30 @@ def test_ffmpeg_timeout_seconds_caps() -> None:
     assert _ffmpeg_timeout_seconds(duration_s=100) == 900.0
 
 
+def test_run_ffmpeg_kills_process_on_stop() -> None:
+    stop = threading.Event()
+    threading.Timer(0.2, stop.set).start()
+    started = time.monotonic()
+
+    proc = _run_ffmpeg(
+        [sys.executable, "-c", "import time; time.sleep(30)"], timeout=60.0, stop_event=stop
+    )
+
+    assert proc is None
+    assert time.monotonic() - started < 10
+
+
+def test_run_ffmpeg_collects_output_when_not_stopped() -> None:
+    proc = _run_ffmpeg(
+        [sys.executable, "-c", "import sys; sys.stdout.write('ok')"],
+        timeout=60.0,
+        stop_event=threading.Event(),
+    )
+
+    assert proc is not None
+    assert (proc.returncode, proc.stdout) == (0, b"ok")
+
+
 def test_slice_wav_bytes_basic() -> None:
     original = _make_wav_bytes(sample_rate=10, channels=1, seconds=2)
     sliced = slice_wav_bytes(original, start_s=1, duration_s=1)
@@ -77,6 +114,96 @@ def test_slice_wav_bytes_invalid_returns_none() -> None:
     assert slice_wav_bytes(b"not a wav", start_s=0, duration_s=1) is None
 
 
+def test_parse_wav_layout_skips_extra_chunks() -> None:
+    original = _make_wav_bytes(sample_rate=8000, channels=2, seconds=1)
+    # Insert a LIST chunk between "fmt " and "data", as many encoders do.
+    extra = b"LIST" + (4).to_bytes(4, "little") + b"INFO"
+    wav_bytes = original[:36] + extra + original[36:]
+
+    layout = parse_wav_layout(wav_bytes)
+    assert layout is not None
+    assert (layout.channels, layout.sampwidth, layout.framerate) == (2, 2, 8000)
+    assert layout.data_offset == 44 + len(extra)
+    assert layout.nframes == 8000
+
+
+def test_parse_wav_layout_clamps_streamed_data_size() -> None:
+    original = bytearray(_make_wav_bytes(sample_rate=10, channels=1, seconds=2))
+    original[40:44] = (0xFFFFFFFF).to_bytes(4, "little")
+
+    layout = parse_wav_layout(original)
+    assert layout is not None
+    assert layout.nframes == 20
+
+
+def test_open_pcm_wav_maps_wav_files_only(tmp_path: Path) -> None:
+    wav_path = tmp_path / "in.wav"
+    wav_path.write_bytes(_make_wav_bytes(sample_rate=8000, channels=1, seconds=3))
+    other_path = tmp_path / "in.mp3"
+    other_path.write_bytes(wav_path.read_bytes())
+
+    with open_pcm_wav(other_path) as mapped:
+        assert mapped is None
+
+    with open_pcm_wav(wav_path) as mapped:
+        assert mapped is not None
+        sliced = slice_wav_bytes(mapped, start_s=1, duration_s=5)
+        assert sliced is not None
+        with wave.open(BytesIO(sliced), "rb") as wav:
+            assert wav.getnframes() == 8000 * 2
+
+
+def test_probe_duration_seconds_reads_pcm_wav_header(tmp_path: Path) -> None:
+    wav_path = tmp_path / "in.wav"
+    wav_path.write_bytes(_make_wav_bytes(sample_rate=8000, channels=2, seconds=3))
+
+    assert probe_duration_seconds(wav_path) == 3.0
+
+
+def test_pack_wav_header_into_matches_wave_module() -> None:
+    expected = _make_wav_bytes(sample_rate=16000, channels=2, seconds=1)
+    buf = bytearray(WAV_HEADER_SIZE + 16000 * 2 * 2)
+    pack_wav_header_into(buf, data_size=16000 * 2 * 2, sample_rate=16000, channels=2)
+    assert bytes(buf) == expected
+
+
+def test_window_energies_matches_direct_sums() -> None:
+    np = pytest.importorskip("numpy")
+    x = np.array([3, -1, 4, -1, 5, -9, 2, 6], dtype="<i2")
+
+    energies = window_energies(x, 3, 2)
+
+    expected = [int((x[o : o + 3].astype(np.int64) ** 2).sum()) for o in (0, 2, 4)]
+    assert energies.tolist() == expected
+
+
+def test_loudest_windows_matches_stable_sort() -> None:
+    np = pytest.importorskip("numpy")
+    energies = np.array([2.0, 5.0, 1.0, 5.0, 3.0, 5.0, 0.0])
+    expected = np.argsort(-energies, kind="stable")
+
+    for count in range(1, energies.size + 2):
+        assert loudest_windows(energies, count).tolist() == expected[:count].tolist()
+
+
+def test_slice_wav_bytes_mono_mixes_down_the_slice() -> None:
+    pytest.importorskip("numpy")
+    values = [10, 30, 20, 40, -2, -4, 7, 9]  # four stereo frames
+    stereo = bytearray(WAV_HEADER_SIZE + 2 * len(values))
+    stereo[WAV_HEADER_SIZE:] = b"".join(v.to_bytes(2, "little", signed=True) for v in values)
+    pack_wav_header_into(stereo, data_size=2 * len(values), sample_rate=2, channels=2)
+    layout = parse_wav_layout(stereo)
+
+    mono = slice_wav_bytes(stereo, start_s=1, duration_s=1, layout=layout, mono=True)
+    assert mono is not None
+    mono_layout = parse_wav_layout(mono)
+    assert mono_layout is not None
+    assert (mono_layout.channels, mono_layout.nframes) == (1, 2)
+    assert bytes(mono[WAV_HEADER_SIZE:]) == b"".join(
+        v.to_bytes(2, "little", signed=True) for v in (-3, 8)
+    )
+
+
 def test_format_hms() -> None:
     assert format_hms(0) == "00:00:00"
     assert format_hms(3661) == "01:01:01"
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from shaq._i18n import I18n
+
+_STRINGS = {
+    "greeting": {"pl": "Cześć, {name}!", "en": "Hello, {name}!"},
+    "only_en": {"en": "English only"},
+}
+
+
+def test_t_uses_language_then_english_fallback() -> None:
+    t = I18n("pl", _STRINGS).t
+    assert t("greeting", name="Ala") == "Cześć, Ala!"
+    assert t("only_en") == "English only"
+    assert t("missing") == "missing"
+
+
+def test_t_returns_template_on_format_error() -> None:
+    t = I18n("en", _STRINGS).t
+    assert t("greeting", other="x") == "Hello, {name}!"
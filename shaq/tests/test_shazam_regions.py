@@ -5,9 +5,11 @@ from shaq._shazam_regions import (
     SUPPORTED_LANGUAGES,
     country_choice_strings,
     country_codes,
+    country_index,
     find_index_by_code,
     language_choice_strings,
     language_codes,
+    language_index,
 )
 
 
@@ -26,3 +28,10 @@ def test_find_index_by_code_is_case_and_separator_insensitive() -> None:
     idx2 = find_index_by_code(SUPPORTED_ENDPOINT_COUNTRIES, "pl")
     assert idx2 is not None
     assert SUPPORTED_ENDPOINT_COUNTRIES[idx2][0] == "PL"
+
+
+def test_index_lookups_match_find_index_by_code() -> None:
+    assert language_index("PL_pl") == find_index_by_code(SUPPORTED_LANGUAGES, "pl-PL")
+    assert country_index(" pl ") == find_index_by_code(SUPPORTED_ENDPOINT_COUNTRIES, "PL")
+    assert language_index("xx-XX") is None
+    assert find_index_by_code([("a", "A"), ("b", "B")], "B") == 1